@@ -1,19 +1,21 @@
 from django.contrib import admin
+from .contadores import recalcular_contadores
 from .models import Cliente
+from .signals import clientes_alterados_em_lote
 
 @admin.register(Cliente)
 class ClienteAdmin(admin.ModelAdmin):
     list_display = ('nome', 'email', 'contato', 'total_pedidos', 'valor_total_gasto', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('nome', 'email', 'contato')
-    readonly_fields = ('total_pedidos', 'valor_total_gasto', 'created_at', 'updated_at')
+    readonly_fields = ('total_pedidos', 'valor_total_gasto', 'ultimo_pedido_em', 'created_at', 'updated_at')
     
     fieldsets = (
         ('Informações Básicas', {
             'fields': ('nome', 'email', 'contato')
         }),
         ('Estatísticas', {
-            'fields': ('total_pedidos', 'valor_total_gasto'),
+            'fields': ('total_pedidos', 'valor_total_gasto', 'ultimo_pedido_em'),
             'classes': ('collapse',)
         }),
         ('Metadados', {
@@ -36,9 +38,7 @@ class ClienteAdmin(admin.ModelAdmin):
     
     def atualizar_estatisticas(self, request, queryset):
         """Action para atualizar estatísticas dos clientes"""
-        count = 0
-        for cliente in queryset:
-            cliente.atualizar_estatisticas()
-            count += 1
+        count = recalcular_contadores(queryset.values('pk'))
+        clientes_alterados_em_lote.send(sender=Cliente, using=queryset.db)
         self.message_user(request, f'Estatísticas atualizadas para {count} clientes.')
     atualizar_estatisticas.short_description = "Atualizar estatísticas"
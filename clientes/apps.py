@@ -5,3 +5,10 @@ class ClientesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clientes'
     verbose_name = 'Gestão de Clientes'
+
+    def ready(self):
+        # Mantém os contadores de pedidos do cliente
+        import clientes.signals  # noqa: F401
+        
+        from core.busca_textual import registrar_indice
+        registrar_indice(self.get_model('Cliente'), ['nome_busca', 'email'])
@@ -0,0 +1,65 @@
+"""
+Manutenção dos contadores de pedidos persistidos em Cliente
+
+Os contadores consideram todos os pedidos do cliente, inclusive os cancelados,
+como as antigas propriedades de Cliente. Um pedido novo soma
+aos contadores com UPDATE ... SET campo = campo + x; alterações, exclusões e
+gravações em lote recalculam os clientes afetados com um único UPDATE.
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    Count, DateTimeField, DecimalField, F, IntegerField, Max, OuterRef, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from pedidos.models import Pedido
+from .models import Cliente
+
+
+def _pedidos_do_cliente(using):
+    return (
+        Pedido.objects.using(using)
+        .filter(cliente=OuterRef('pk'))
+        .order_by()
+        .values('cliente')
+    )
+
+
+def recalcular_contadores(clientes, using='default'):
+    """
+    Recalcula total_pedidos, valor_total_gasto e ultimo_pedido_em com um único UPDATE.
+
+    `clientes` pode ser uma lista de ids ou um queryset (inclusive subconsulta
+    de ids); None recalcula todos os clientes.
+    """
+    pedidos = _pedidos_do_cliente(using)
+    queryset = Cliente.objects.using(using)
+    if clientes is not None:
+        queryset = queryset.filter(pk__in=clientes)
+    return queryset.update(
+        total_pedidos=Coalesce(
+            Subquery(pedidos.annotate(n=Count('pk')).values('n')),
+            Value(0),
+            output_field=IntegerField(),
+        ),
+        valor_total_gasto=Coalesce(
+            Subquery(pedidos.annotate(soma=Sum('total')).values('soma')),
+            Value(Decimal('0.00')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+        ultimo_pedido_em=Subquery(
+            pedidos.annotate(ultimo=Max('data_pedido')).values('ultimo'),
+            output_field=DateTimeField(),
+        ),
+    )
+
+
+def registrar_pedido(cliente_id, total, data_pedido, using='default'):
+    """Soma um pedido novo aos contadores do cliente"""
+    return Cliente.objects.using(using).filter(pk=cliente_id).update(
+        total_pedidos=F('total_pedidos') + 1,
+        valor_total_gasto=F('valor_total_gasto') + Decimal(str(total)),
+        ultimo_pedido_em=Greatest(Coalesce('ultimo_pedido_em', Value(data_pedido)), Value(data_pedido)),
+    )
+
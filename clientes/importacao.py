@@ -0,0 +1,90 @@
+"""
+Importação de clientes em lote (upsert pelo email) a partir de NDJSON ou CSV
+"""
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from core.busca import normalizar_busca
+from core.importacao import ResultadoImportacao, em_lotes
+from .models import Cliente
+from .serializers import ClienteImportacaoSerializer
+from .signals import clientes_alterados_em_lote
+
+
+# Colunas sobrescritas quando o email já existe; os contadores de pedidos são preservados
+CAMPOS_ATUALIZADOS = ['nome', 'nome_busca', 'contato', 'updated_at']
+
+
+class ResultadoImportacaoClientes(ResultadoImportacao):
+    """Resultado com a separação entre clientes criados, atualizados e linhas repetidas"""
+
+    def __init__(self, max_erros=1000):
+        super().__init__(max_erros)
+        self.atualizados = 0
+        self.repetidos = 0
+
+    def como_dict(self):
+        dados = super().como_dict()
+        dados['criados'] = self.importados - self.atualizados
+        dados['atualizados'] = self.atualizados
+        dados['emails_repetidos'] = self.repetidos
+        return dados
+
+
+def importar_clientes(registros, tamanho_lote=None, ao_concluir_lote=None):
+    """
+    Valida e grava clientes em lotes, um INSERT ... ON CONFLICT (email) por lote.
+
+    `registros` vem de core.importacao.ler_registros; linhas inválidas entram
+    no resultado sem interromper o arquivo. Dentro de um lote, a última linha
+    de cada email prevalece e as anteriores contam em `emails_repetidos`.
+    """
+    tamanho_lote = tamanho_lote or getattr(settings, 'IMPORTACAO_TAMANHO_LOTE', 500)
+    resultado = ResultadoImportacaoClientes()
+    for lote in em_lotes(registros, tamanho_lote):
+        _importar_lote(lote, resultado)
+        if ao_concluir_lote:
+            ao_concluir_lote(resultado)
+    return resultado
+
+
+def _importar_lote(lote, resultado):
+    validador = ClienteImportacaoSerializer()
+    por_email = {}
+    for linha, dados, erro in lote:
+        resultado.total += 1
+        if erro:
+            resultado.adicionar_erro(linha, erro)
+            continue
+        try:
+            validos = validador.run_validation(dados)
+        except ValidationError as exc:
+            resultado.adicionar_erro(linha, as_serializer_error(exc), dados.get('email'))
+            continue
+        if por_email.pop(validos['email'], None):
+            resultado.repetidos += 1
+        por_email[validos['email']] = (
+            linha,
+            Cliente(nome_busca=normalizar_busca(validos['nome'])[:255], **validos),
+        )
+
+    if not por_email:
+        return
+    try:
+        with transaction.atomic():
+            existentes = Cliente.objects.filter(email__in=list(por_email)).count()
+            Cliente.objects.bulk_create(
+                [cliente for _, cliente in por_email.values()],
+                update_conflicts=True,
+                unique_fields=['email'],
+                update_fields=CAMPOS_ATUALIZADOS,
+            )
+            clientes_alterados_em_lote.send(sender=Cliente, using='default')
+    except DatabaseError as exc:
+        for email, (linha, _) in por_email.items():
+            resultado.adicionar_erro(linha, f'Erro ao gravar o lote: {exc}', email)
+        return
+    resultado.importados += len(por_email)
+    resultado.atualizados += existentes
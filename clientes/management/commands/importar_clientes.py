@@ -0,0 +1,45 @@
+"""
+Importação de clientes em lote a partir de NDJSON ou CSV
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from clientes.importacao import importar_clientes
+from core.importacao import FORMATOS, detectar_formato, ler_registros
+
+
+class Command(BaseCommand):
+    help = 'Importa clientes de um arquivo NDJSON ou CSV, atualizando os existentes pelo email'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+        parser.add_argument('--formato', choices=FORMATOS)
+        parser.add_argument('--lote', type=int, help='Clientes por transação')
+        parser.add_argument('--max-erros', type=int, default=20, help='Erros exibidos ao final')
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or detectar_formato(options['arquivo'])
+        try:
+            arquivo = open(options['arquivo'], 'rb')
+        except OSError as exc:
+            raise CommandError(f'Não foi possível abrir o arquivo: {exc}')
+
+        with arquivo:
+            resultado = importar_clientes(
+                ler_registros(arquivo, formato),
+                tamanho_lote=options['lote'],
+                ao_concluir_lote=self.exibir_progresso,
+            )
+
+        for erro in resultado.erros[:options['max_erros']]:
+            self.stderr.write(f"Linha {erro['linha']}: {erro['erros']}")
+        resumo = resultado.como_dict()
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumo['criados']} clientes criados, {resumo['atualizados']} atualizados, "
+            f'{resultado.com_erro} com erro, {resultado.total} linhas em {resultado.duracao:.1f}s '
+            f'({resultado.linhas_por_segundo} linhas/s)'
+        ))
+
+    def exibir_progresso(self, resultado):
+        self.stdout.write(
+            f'{resultado.total} linhas processadas ({resultado.linhas_por_segundo} linhas/s)'
+        )
@@ -0,0 +1,31 @@
+"""
+Reconstrução dos contadores de pedidos dos clientes
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from clientes.contadores import recalcular_contadores
+from clientes.models import Cliente
+
+
+class Command(BaseCommand):
+    help = 'Recalcula total_pedidos, valor_total_gasto e ultimo_pedido_em de todos os clientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=5000,
+            help='Faixa de ids de clientes recalculada por transação',
+        )
+
+    def handle(self, *args, **options):
+        lote = max(1, options['lote'])
+        maior_id = Cliente.objects.aggregate(maior=Max('pk'))['maior'] or 0
+        atualizados = 0
+        # Faixas de ids mantêm cada UPDATE (e seus locks) curto em tabelas grandes
+        for inicio in range(0, maior_id, lote):
+            with transaction.atomic():
+                atualizados += recalcular_contadores(
+                    Cliente.objects.filter(pk__gt=inicio, pk__lte=inicio + lote).values('pk')
+                )
+        self.stdout.write(self.style.SUCCESS(f'Contadores recalculados para {atualizados} clientes'))
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:59
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def preencher_contadores(apps, schema_editor):
+    """Calcula os contadores dos clientes existentes com um único UPDATE"""
+    Cliente = apps.get_model('clientes', 'Cliente')
+    Pedido = apps.get_model('pedidos', 'Pedido')
+    db_alias = schema_editor.connection.alias
+    pedidos = (
+        Pedido.objects.using(db_alias)
+        .filter(cliente=OuterRef('pk'))
+        .order_by()
+        .values('cliente')
+    )
+    Cliente.objects.using(db_alias).update(
+        total_pedidos=Coalesce(
+            Subquery(pedidos.annotate(n=Count('pk')).values('n')), Value(0),
+            output_field=models.IntegerField(),
+        ),
+        valor_total_gasto=Coalesce(
+            Subquery(pedidos.annotate(soma=Sum('total')).values('soma')), Value(Decimal('0.00')),
+            output_field=models.DecimalField(max_digits=14, decimal_places=2),
+        ),
+        ultimo_pedido_em=Subquery(
+            pedidos.annotate(ultimo=Max('data_pedido')).values('ultimo'),
+            output_field=models.DateTimeField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0001_initial'),
+        ('pedidos', '0002_sequencia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='total_pedidos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='ultimo_pedido_em',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='valor_total_gasto',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.RunPython(preencher_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0002_contadores_pedidos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['-total_pedidos', '-valor_total_gasto'], name='clientes_total_p_1b05e1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['-valor_total_gasto', '-total_pedidos'], name='clientes_valor_t_9be9aa_idx'),
+        ),
+    ]
@@ -1,11 +1,26 @@
 from django.db import models
+from core.busca import normalizar_busca
+
+
+# Mantidos a partir dos pedidos; um Cliente.save() sem update_fields não os grava
+CAMPOS_CONTADORES = ('total_pedidos', 'valor_total_gasto', 'ultimo_pedido_em')
+
 
 class Cliente(models.Model):
     id = models.AutoField(primary_key=True)
     nome = models.CharField(max_length=255)
+    # Nome sem acentos e em minúsculas, para busca por prefixo (core.busca)
+    nome_busca = models.CharField(max_length=255, default='', editable=False)
     email = models.EmailField(unique=True)
     contato = models.CharField(max_length=20)
     
+    # Contadores mantidos a partir dos pedidos do cliente (ver clientes/contadores.py)
+    total_pedidos = models.PositiveIntegerField(default=0, editable=False)
+    valor_total_gasto = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    ultimo_pedido_em = models.DateTimeField(null=True, blank=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -14,17 +29,35 @@ class Cliente(models.Model):
         verbose_name = 'Cliente'
         verbose_name_plural = 'Clientes'
         ordering = ['nome']
+        indexes = [
+            models.Index(
+                fields=['nome_busca'], name='clientes_nome_busca_idx',
+                opclasses=['varchar_pattern_ops']
+            ),
+            # Rankings de clientes (relatorios.services.ranking_clientes)
+            models.Index(fields=['-total_pedidos', '-valor_total_gasto']),
+            models.Index(fields=['-valor_total_gasto', '-total_pedidos']),
+        ]
     
     def __str__(self):
         return self.nome
     
-    @property
-    def total_pedidos(self):
-        return self.pedidos.count()
+    def save(self, *args, **kwargs):
+        self.nome_busca = normalizar_busca(self.nome)[:255]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not (self._state.adding or args or kwargs.get('force_insert')):
+            # Os contadores só mudam pelos UPDATEs de clientes/contadores.py; um save
+            # comum (admin, API) gravaria de volta os valores lidos antes
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name not in CAMPOS_CONTADORES
+            ]
+        elif update_fields is not None and 'nome' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'nome_busca'}
+        super().save(*args, **kwargs)
     
-    @property
-    def valor_total_gasto(self):
-        total = self.pedidos.aggregate(
-            total=models.Sum('total')
-        )['total'] or 0
-        return total
+    def atualizar_estatisticas(self):
+        """Recalcula os contadores de pedidos a partir da tabela de pedidos"""
+        from .contadores import recalcular_contadores
+        recalcular_contadores([self.pk], using=self._state.db or 'default')
+        self.refresh_from_db(fields=['total_pedidos', 'valor_total_gasto', 'ultimo_pedido_em'])
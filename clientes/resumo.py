@@ -0,0 +1,50 @@
+"""
+Resumo dos pedidos de um cliente, em cache até a próxima alteração nos pedidos dele
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Min, Sum
+
+from pedidos.models import Pedido
+
+
+def chave_resumo(cliente_id):
+    return f'clientes:resumo:{cliente_id}'
+
+
+def resumo_pedidos(cliente_id):
+    """
+    Quantidade e valor por status e data do primeiro pedido, em um único GROUP BY
+    sobre o índice (cliente, status).
+    """
+    chave = chave_resumo(cliente_id)
+    resumo = cache.get(chave)
+    if resumo is not None:
+        return resumo
+
+    linhas = {
+        linha['status']: linha
+        for linha in Pedido.objects.filter(cliente_id=cliente_id)
+        .order_by()
+        .values('status')
+        .annotate(quantidade=Count('id'), valor=Sum('total'), primeiro=Min('data_pedido'))
+    }
+    resumo = {
+        'por_status': {
+            valor: {
+                'label': label,
+                'count': linhas.get(valor, {}).get('quantidade', 0),
+                'valor_total': linhas.get(valor, {}).get('valor') or Decimal('0.00'),
+            }
+            for valor, label in Pedido.StatusChoices.choices
+        },
+        'primeiro_pedido_em': min((linha['primeiro'] for linha in linhas.values()), default=None),
+    }
+    cache.set(chave, resumo, getattr(settings, 'RESUMO_CLIENTE_CACHE_TIMEOUT', 600))
+    return resumo
+
+
+def invalidar_resumos(cliente_ids):
+    cache.delete_many([chave_resumo(cliente_id) for cliente_id in cliente_ids])
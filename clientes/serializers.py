@@ -10,7 +10,7 @@ class ClienteSerializer(serializers.ModelSerializer):
         model = Cliente
         fields = [
             'id', 'nome', 'email', 'contato', 
-            'total_pedidos', 'valor_total_gasto',
+            'total_pedidos', 'valor_total_gasto', 'ultimo_pedido_em',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
@@ -52,7 +52,16 @@ class ClienteDetalhesSerializer(serializers.ModelSerializer):
         model = Cliente
         fields = [
             'id', 'nome', 'email', 'contato', 
-            'total_pedidos', 'valor_total_gasto',
+            'total_pedidos', 'valor_total_gasto', 'ultimo_pedido_em',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class ClienteImportacaoSerializer(serializers.ModelSerializer):
+    """Valida uma linha da importação em lote sem consultar o banco (o email faz upsert)"""
+    email = serializers.EmailField(max_length=254)
+    
+    class Meta:
+        model = Cliente
+        fields = ['nome', 'email', 'contato']
@@ -0,0 +1,74 @@
+"""
+Atualização dos contadores e do resumo em cache de Cliente a partir das gravações de pedidos
+
+Também define `clientes_alterados_em_lote`, enviado por quem grava clientes
+com bulk_create ou update() (que não disparam post_save).
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+
+from pedidos.models import Pedido
+from pedidos.signals import pedidos_alterados_em_lote
+from .contadores import recalcular_contadores, registrar_pedido
+from .resumo import invalidar_resumos
+
+
+CAMPOS_CONTADORES = ('cliente_id', 'total', 'data_pedido')
+
+# Argumentos: using
+clientes_alterados_em_lote = Signal()
+
+
+def _estado_contadores(pedido):
+    """(cliente_id, total, data_pedido) do pedido, ou None se algum campo não foi carregado"""
+    dados = pedido.__dict__
+    if any(campo not in dados for campo in CAMPOS_CONTADORES):
+        return None
+    return tuple(dados[campo] for campo in CAMPOS_CONTADORES)
+
+
+def _invalidar_resumos(cliente_ids, using):
+    transaction.on_commit(partial(invalidar_resumos, set(cliente_ids)), using=using)
+
+
+@receiver(post_init, sender=Pedido)
+def guardar_estado_original(sender, instance, **kwargs):
+    instance._contadores_original = _estado_contadores(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=Pedido)
+def pedido_salvo(sender, instance, created, using=None, **kwargs):
+    antes = None if created else getattr(instance, '_contadores_original', None)
+    depois = _estado_contadores(instance)
+    instance._contadores_original = depois
+
+    if created:
+        if depois:
+            registrar_pedido(instance.cliente_id, instance.total, instance.data_pedido, using=using)
+        _invalidar_resumos([instance.cliente_id], using)
+        return
+    if antes is not None and antes == depois:
+        return
+    # Mudou cliente, total ou data (ou o estado anterior é desconhecido):
+    # recalcula só os clientes envolvidos, a partir dos pedidos
+    clientes = {instance.cliente_id}
+    if antes:
+        clientes.add(antes[0])
+    recalcular_contadores(clientes, using=using)
+    _invalidar_resumos(clientes, using)
+
+
+@receiver(post_delete, sender=Pedido)
+def pedido_excluido(sender, instance, using=None, **kwargs):
+    recalcular_contadores([instance.cliente_id], using=using)
+    _invalidar_resumos([instance.cliente_id], using)
+
+
+@receiver(pedidos_alterados_em_lote)
+def pedidos_alterados(sender, pedido_ids, using='default', **kwargs):
+    clientes = Pedido.objects.using(using).filter(pk__in=pedido_ids).values('cliente_id')
+    recalcular_contadores(clientes, using=using)
+    _invalidar_resumos(clientes.order_by().values_list('cliente_id', flat=True).distinct(), using)
@@ -5,26 +5,46 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from core.condicional import gerar_etag, get_condicional
+from core.filters import BuscaTextualFilter
+from core.importacao import FORMATOS, detectar_formato, ler_registros
+from core.mixins import AutocompletarMixin
+from .importacao import importar_clientes
 from .models import Cliente
+from .resumo import resumo_pedidos
 from .serializers import (
     ClienteSerializer, ClienteListSerializer, 
     ClienteSelectSerializer, ClienteDetalhesSerializer
 )
 from pedidos.serializers import PedidoHistoricoClienteSerializer
+from pedidos.views import PedidoKeysetPagination
+from relatorios.services import ler_limite, ranking_clientes
+
+
+def etag_cliente(request, pk=None, **kwargs):
+    """Alterações do cadastro mudam updated_at; as de pedidos mudam os contadores"""
+    impressao = (
+        Cliente.objects.filter(pk=pk)
+        .values_list('updated_at', 'total_pedidos', 'valor_total_gasto', 'ultimo_pedido_em')
+        .first()
+    )
+    if impressao is None:
+        return None
+    return gerar_etag(request, *impressao)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class ClienteViewSet(viewsets.ModelViewSet):
+class ClienteViewSet(AutocompletarMixin, viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['nome', 'email']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, BuscaTextualFilter]
     ordering_fields = ['nome', 'created_at']
     ordering = ['nome']
+    autocompletar_serializer_class = ClienteSelectSerializer
 
     def get_serializer_class(self):
         if self.action == 'list':
             return ClienteListSerializer
-        elif self.action == 'select':
+        elif self.action in ('select', 'autocompletar'):
             return ClienteSelectSerializer
         elif self.action == 'detalhes':
             return ClienteDetalhesSerializer
@@ -40,44 +60,85 @@ class ClienteViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    @get_condicional(etag_cliente)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'])
     def select(self, request):
-        """Endpoint para select de clientes"""
+        """Endpoint para select de clientes (com ?q=, apenas os primeiros que começam com o termo)"""
+        if 'q' in request.query_params:
+            return self.autocompletar(request)
         clientes = self.get_queryset()
         serializer = ClienteSelectSerializer(clientes, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def importar(self, request):
+        """Importa clientes em lote (NDJSON ou CSV), atualizando os que já existem pelo email"""
+        arquivo = request.FILES.get('arquivo')
+        if not arquivo:
+            return Response(
+                {'error': 'Envie o arquivo no campo "arquivo"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        formato = request.query_params.get('formato') or detectar_formato(arquivo.name)
+        if formato not in FORMATOS:
+            return Response(
+                {'error': f"Formato inválido. Use: {', '.join(FORMATOS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        resultado = importar_clientes(ler_registros(arquivo, formato))
+        return Response(resultado.como_dict())
+
     @action(detail=True, methods=['get'])
     def detalhes(self, request, pk=None):
-        """Detalhes do cliente com histórico de pedidos"""
+        """
+        Detalhes do cliente, resumo dos pedidos (em cache) e uma página do histórico.
+
+        O histórico é paginado por cursor em (data_pedido, id); use o link
+        `next` para as páginas seguintes.
+        """
         cliente = self.get_object()
         
-        # Dados do cliente
+        # Dados do cliente (contadores já persistidos na própria linha)
         cliente_serializer = ClienteDetalhesSerializer(cliente)
         
-        # Histórico de pedidos
-        pedidos = cliente.pedidos.all().order_by('-data_pedido')
+        # Histórico de pedidos: uma varredura no índice (cliente, data_pedido)
+        paginador = PedidoKeysetPagination()
+        pedidos = paginador.paginate_queryset(cliente.pedidos.all(), request, view=self)
         pedidos_serializer = PedidoHistoricoClienteSerializer(pedidos, many=True)
         
         return Response({
             'cliente': cliente_serializer.data,
-            'historico_pedidos': pedidos_serializer.data
+            'resumo_pedidos': resumo_pedidos(cliente.pk),
+            'historico_pedidos': {
+                'next': paginador.get_next_link(),
+                'previous': paginador.get_previous_link(),
+                'results': pedidos_serializer.data
+            }
         })
 
     @action(detail=False, methods=['get'])
     def mais_ativos(self, request):
-        """Clientes mais ativos (para relatórios)"""
-        limite = int(request.query_params.get('limite', 10))
-        
-        # Buscar clientes ordenados por valor total gasto
-        clientes = self.get_queryset().order_by('-total_pedidos')[:limite]
+        """Clientes mais ativos (para relatórios), por quantidade de pedidos ou valor gasto"""
+        try:
+            clientes = ranking_clientes(
+                limite=ler_limite(request.query_params),
+                criterio=request.query_params.get('criterio', 'pedidos'),
+                queryset=self.get_queryset()
+            )
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
         dados = []
         for cliente in clientes:
             dados.append({
                 'cliente': cliente.nome,
-                'total_pedidos': cliente.total_pedidos,
-                'total_gasto': cliente.valor_total_gasto
+                'total_pedidos': cliente.qtd_pedidos,
+                'total_gasto': cliente.valor_pedidos
             })
         
         return Response(dados)
@@ -1,7 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
     verbose_name = 'Core'
+
+    def ready(self):
+        # Cria (ou recria) os índices de busca textual ao fim de cada migrate
+        from .busca_textual import instalar_indices
+        post_migrate.connect(instalar_indices, sender=self)
@@ -0,0 +1,44 @@
+"""
+Busca por prefixo (autocompletar) sobre colunas de texto normalizadas
+"""
+import re
+import unicodedata
+
+from django.db import connections
+
+
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 50
+
+_ESPACOS = re.compile(r'\s+')
+# Todo texto que começa com o prefixo fica entre prefixo e prefixo + '\uffff'
+_FIM_PREFIXO = '\uffff'
+
+
+def normalizar_busca(texto):
+    """Minúsculas, sem acentos e com espaços simples: ' José  Ávila' -> 'jose avila'"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(caractere for caractere in texto if not unicodedata.combining(caractere))
+    return _ESPACOS.sub(' ', texto).strip().casefold()
+
+
+def filtrar_prefixo(queryset, campo, termo):
+    """
+    Registros cujo `campo` (já normalizado) começa com o termo, em ordem alfabética.
+
+    No PostgreSQL vira LIKE 'prefixo%' (índice varchar_pattern_ops); nos demais
+    bancos, um intervalo campo >= prefixo AND campo < prefixo + '\\uffff',
+    que o índice comum resolve sem ler as linhas fora do intervalo.
+    """
+    prefixo = normalizar_busca(termo)
+    if not prefixo:
+        return queryset.none()
+    if connections[queryset.db].vendor == 'postgresql':
+        queryset = queryset.filter(**{f'{campo}__startswith': prefixo})
+    else:
+        queryset = queryset.filter(**{
+            f'{campo}__gte': prefixo,
+            f'{campo}__lt': prefixo + _FIM_PREFIXO,
+        })
+    return queryset.order_by(campo, 'pk')
+
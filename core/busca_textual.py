@@ -0,0 +1,234 @@
+"""
+Busca textual com backend plugável
+
+O backend vem de BUSCA_TEXTUAL_BACKEND:
+
+- 'fts5': tabela virtual SQLite FTS5 por modelo, mantida por triggers;
+- 'postgres': índice GIN sobre to_tsvector('simple', ...);
+- 'contains': LIKE '%termo%' em cada campo (sem índice, só como reserva);
+- 'auto' (padrão): postgres no PostgreSQL, fts5 no SQLite quando a tabela
+  de busca existe, contains nos demais casos.
+
+Os modelos pesquisáveis são registrados com registrar_indice() no ready() do
+app; os índices são criados (ou recriados) ao fim de cada `migrate`.
+Os termos são normalizados como em core.busca e cada palavra é tratada como
+prefixo, então 'jos sil' encontra 'José da Silva'.
+"""
+import logging
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .busca import normalizar_busca
+
+
+logger = logging.getLogger(__name__)
+
+INDICES = {}
+_PALAVRA = re.compile(r'\w+')
+
+
+def registrar_indice(model, campos):
+    """Torna `model` pesquisável pelos `campos` (colunas de texto do próprio modelo)"""
+    INDICES[model] = tuple(campos)
+
+
+def palavras(termo):
+    return _PALAVRA.findall(normalizar_busca(termo))
+
+
+class BackendContains:
+    """LIKE '%palavra%' em qualquer campo, para cada palavra; sem relevância"""
+    nome = 'contains'
+
+    def instalar(self, connection, model, campos):
+        pass
+
+    def _condicao(self, termo, campos):
+        return reduce(and_, (
+            reduce(or_, (Q(**{f'{campo}__icontains': palavra}) for campo in campos))
+            for palavra in palavras(termo)
+        ))
+
+    def ids(self, model, termo, campos, using):
+        return model._default_manager.using(using).filter(self._condicao(termo, campos)).values('pk')
+
+    def filtrar(self, queryset, termo, campos):
+        return queryset.filter(self._condicao(termo, campos)).annotate(
+            relevancia=Value(0.0, output_field=FloatField())
+        )
+
+
+class BackendFTS5:
+    """Tabela virtual FTS5 de conteúdo externo (<tabela>_fts), sincronizada por triggers"""
+    nome = 'fts5'
+
+    def tabela(self, model):
+        return f'{model._meta.db_table}_fts'
+
+    def instalar(self, connection, model, campos):
+        tabela, fts = model._meta.db_table, self.tabela(model)
+        colunas = [model._meta.get_field(campo).column for campo in campos]
+        lista = ', '.join(colunas)
+        novos = ', '.join(f'new.{coluna}' for coluna in colunas)
+        antigos = ', '.join(f'old.{coluna}' for coluna in colunas)
+        sqls = [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({lista}, content='{tabela}', "
+            f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabela} BEGIN "
+            f"INSERT INTO {fts}(rowid, {lista}) VALUES (new.id, {novos}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabela} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {lista}) VALUES ('delete', old.id, {antigos}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {lista} ON {tabela} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {lista}) VALUES ('delete', old.id, {antigos}); "
+            f"INSERT INTO {fts}(rowid, {lista}) VALUES (new.id, {novos}); END",
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [f'{fts}_a_'],
+            )
+            completo = cursor.fetchone()[0] == 3
+            for sql in sqls:
+                cursor.execute(sql)
+            # O SQLite recria a tabela em algumas alterações de schema e os
+            # triggers somem junto; nesse caso o índice é reconstruído
+            if not completo:
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+    def consulta(self, termo):
+        return ' '.join('"%s"*' % palavra for palavra in palavras(termo))
+
+    def ids(self, model, termo, campos, using):
+        fts = self.tabela(model)
+        return RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [self.consulta(termo)])
+
+    def filtrar(self, queryset, termo, campos):
+        model = queryset.model
+        fts, tabela = self.tabela(model), model._meta.db_table
+        consulta = self.consulta(termo)
+        # bm25 é menor para os melhores resultados; relevancia segue "maior é melhor"
+        relevancia = RawSQL(
+            f'SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s AND rowid = "{tabela}"."id"',
+            [consulta],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=self.ids(model, termo, campos, queryset.db)).annotate(
+            relevancia=relevancia
+        )
+
+
+class BackendPostgres:
+    """to_tsvector('simple', ...) com índice GIN de expressão e prefixos no tsquery"""
+    nome = 'postgres'
+
+    def vetor(self, campos):
+        from django.contrib.postgres.search import SearchVector
+        return SearchVector(*campos, config='simple')
+
+    def consulta(self, termo):
+        from django.contrib.postgres.search import SearchQuery
+        return SearchQuery(
+            ' & '.join(f'{palavra}:*' for palavra in palavras(termo)),
+            config='simple',
+            search_type='raw',
+        )
+
+    def instalar(self, connection, model, campos):
+        tabela = model._meta.db_table
+        colunas = [model._meta.get_field(campo).column for campo in campos]
+        # Mesma expressão gerada por SearchVector(*campos, config='simple')
+        expressao = " || ' ' || ".join(
+            f'COALESCE({connection.ops.quote_name(coluna)}, \'\')' for coluna in colunas
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {tabela}_busca_gin ON {tabela} '
+                f"USING GIN (to_tsvector('simple'::regconfig, {expressao}))"
+            )
+
+    def ids(self, model, termo, campos, using):
+        return (
+            model._default_manager.using(using)
+            .annotate(_vetor=self.vetor(campos))
+            .filter(_vetor=self.consulta(termo))
+            .values('pk')
+        )
+
+    def filtrar(self, queryset, termo, campos):
+        from django.contrib.postgres.search import SearchRank
+        consulta = self.consulta(termo)
+        return (
+            queryset.annotate(_vetor=self.vetor(campos))
+            .filter(_vetor=consulta)
+            .annotate(relevancia=SearchRank(F('_vetor'), consulta))
+        )
+
+
+BACKENDS = {
+    backend.nome: backend
+    for backend in (BackendContains(), BackendFTS5(), BackendPostgres())
+}
+_tabelas_fts = {}
+
+
+def obter_backend(model, using='default'):
+    """Backend configurado para o banco `using`, resolvendo 'auto'"""
+    nome = getattr(settings, 'BUSCA_TEXTUAL_BACKEND', 'auto')
+    if nome != 'auto':
+        return BACKENDS[nome]
+
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return BACKENDS['postgres']
+    if connection.vendor == 'sqlite':
+        chave = (using, model)
+        if chave not in _tabelas_fts:
+            with connection.cursor() as cursor:
+                _tabelas_fts[chave] = (
+                    BACKENDS['fts5'].tabela(model) in connection.introspection.table_names(cursor)
+                )
+        if _tabelas_fts[chave]:
+            return BACKENDS['fts5']
+    return BACKENDS['contains']
+
+
+def buscar(queryset, termo):
+    """
+    Filtra o queryset (de um modelo registrado) pelo termo e anota `relevancia`,
+    maior para os melhores resultados. Termo vazio, ou modelo sem índice
+    registrado (como o SearchFilter sem search_fields), devolve o queryset intacto.
+    """
+    campos = INDICES.get(queryset.model)
+    if not palavras(termo) or campos is None:
+        return queryset
+    return obter_backend(queryset.model, queryset.db).filtrar(queryset, termo, campos)
+
+
+def ids_encontrados(model, termo, using='default'):
+    """Subconsulta com os ids de `model` que correspondem ao termo, para usar em filtros __in"""
+    backend = obter_backend(model, using)
+    return backend.ids(model, termo, INDICES[model], using)
+
+
+def instalar_indices(using='default', **kwargs):
+    """Cria os índices de busca dos modelos registrados (idempotente; roda após o migrate)"""
+    connection = connections[using]
+    tabelas = connection.introspection.table_names()
+    for model, campos in INDICES.items():
+        if model._meta.db_table not in tabelas:
+            continue
+        backend = obter_backend(model, using)
+        if backend.nome == 'contains' and connection.vendor == 'sqlite' \
+                and getattr(settings, 'BUSCA_TEXTUAL_BACKEND', 'auto') == 'auto':
+            backend = BACKENDS['fts5']
+        try:
+            backend.instalar(connection, model, campos)
+        except OperationalError as exc:
+            logger.warning('Índice de busca de %s não criado: %s', model._meta.label, exc)
+    _tabelas_fts.clear()
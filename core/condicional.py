@@ -0,0 +1,32 @@
+"""
+Requisições condicionais (ETag / If-None-Match) para ações de leitura
+
+As ETags saem de uma impressão digital barata do recurso (colunas de
+atualização, contadores ou a versão de um cache), nunca da resposta pronta:
+quando o cliente já tem a versão atual, a view devolve 304 sem serializar nada.
+"""
+import hashlib
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+
+def gerar_etag(request, *partes):
+    """
+    ETag das partes informadas, variando também com a URL completa (filtros,
+    página) e com o formato pedido no Accept.
+    """
+    conteudo = '|'.join(
+        str(parte) for parte in (request.get_full_path(), request.META.get('HTTP_ACCEPT', ''), *partes)
+    )
+    return hashlib.md5(conteudo.encode()).hexdigest()
+
+
+def get_condicional(etag_func):
+    """
+    Aplica condition(etag_func=...) a um método de ViewSet.
+
+    `etag_func(request, *args, **kwargs)` deve devolver a ETag do recurso, ou
+    None quando não for possível calculá-la (a view então responde normalmente).
+    """
+    return method_decorator(condition(etag_func=etag_func))
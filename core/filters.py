@@ -0,0 +1,45 @@
+"""
+Filter backends da API
+"""
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+from rest_framework.settings import api_settings
+
+from .busca_textual import INDICES, buscar
+
+
+class BuscaTextualFilter(BaseFilterBackend):
+    """
+    Substitui o SearchFilter: ?search= passa pelo backend de core.busca_textual.
+
+    Sem ?ordering= explícito os resultados vêm por relevância, então este
+    backend deve ficar depois do OrderingFilter. A view pode definir
+    `buscar(queryset, termo)` para uma busca própria (ex.: por relacionamento).
+    Modelos sem índice registrado seguem o SearchFilter (search_fields da view).
+    """
+    search_param = api_settings.SEARCH_PARAM
+    ordering_param = api_settings.ORDERING_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        termo = request.query_params.get(self.search_param, '')
+        if not termo.strip():
+            return queryset
+
+        buscar_view = getattr(view, 'buscar', None)
+        if buscar_view is None:
+            if queryset.model not in INDICES:
+                return SearchFilter().filter_queryset(request, queryset, view)
+            buscar_view = buscar
+        queryset = buscar_view(queryset, termo)
+        if self.ordering_param not in request.query_params \
+                and 'relevancia' in queryset.query.annotations:
+            queryset = queryset.order_by('-relevancia', *queryset.query.order_by)
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Busca textual (cada palavra como prefixo, sem acentos)',
+            'schema': {'type': 'string'},
+        }]
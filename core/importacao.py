@@ -0,0 +1,107 @@
+"""
+Leitura de arquivos de importação (NDJSON e CSV) em streaming
+"""
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+
+FORMATOS = ('ndjson', 'csv')
+
+
+def detectar_formato(nome_arquivo, padrao='ndjson'):
+    """Deduz o formato pela extensão do arquivo"""
+    extensao = str(nome_arquivo).rsplit('.', 1)[-1].lower()
+    if extensao in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    if extensao == 'csv':
+        return 'csv'
+    return padrao
+
+
+def abrir_texto(arquivo):
+    """Garante leitura em texto UTF-8, aceitando arquivos binários ou uploads"""
+    if isinstance(arquivo, io.TextIOBase):
+        return arquivo
+    arquivo = getattr(arquivo, 'file', arquivo)
+    return io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+
+
+def ler_registros(arquivo, formato):
+    """
+    Gera (linha, dados, erro) para cada registro do arquivo, sem carregá-lo inteiro.
+
+    Linhas que não puderem ser lidas geram `dados=None` e a mensagem em `erro`,
+    para que o restante do arquivo continue sendo processado.
+    """
+    arquivo = abrir_texto(arquivo)
+    if formato == 'csv':
+        leitor = csv.DictReader(arquivo)
+        for registro in leitor:
+            yield leitor.line_num, registro, None
+        return
+
+    for numero, linha in enumerate(arquivo, 1):
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            dados = json.loads(linha)
+        except json.JSONDecodeError as exc:
+            yield numero, None, f'JSON inválido: {exc.msg}'
+            continue
+        if not isinstance(dados, dict):
+            yield numero, None, 'Cada linha deve conter um objeto JSON'
+            continue
+        yield numero, dados, None
+
+
+def em_lotes(iteravel, tamanho):
+    """Agrupa um iterável em listas de até `tamanho` elementos"""
+    iterador = iter(iteravel)
+    while True:
+        lote = list(islice(iterador, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+class ResultadoImportacao:
+    """Totais, erros por linha e vazão de uma importação"""
+
+    def __init__(self, max_erros=1000):
+        self.total = 0
+        self.importados = 0
+        self.com_erro = 0
+        self.erros = []
+        self.max_erros = max_erros
+        self._inicio = time.monotonic()
+
+    def adicionar_erro(self, linha, erros, referencia=None):
+        self.com_erro += 1
+        if len(self.erros) < self.max_erros:
+            erro = {'linha': linha, 'erros': erros}
+            if referencia:
+                erro['referencia'] = referencia
+            self.erros.append(erro)
+
+    @property
+    def duracao(self):
+        return time.monotonic() - self._inicio
+
+    @property
+    def linhas_por_segundo(self):
+        return round(self.total / self.duracao, 1) if self.duracao else 0.0
+
+    def como_dict(self):
+        return {
+            'total_linhas': self.total,
+            'importados': self.importados,
+            'com_erro': self.com_erro,
+            'duracao_segundos': round(self.duracao, 3),
+            'linhas_por_segundo': self.linhas_por_segundo,
+            'erros': self.erros,
+            'erros_omitidos': self.com_erro - len(self.erros),
+        }
@@ -0,0 +1,33 @@
+"""
+Mixins reutilizados pelos ViewSets da API
+"""
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .busca import LIMITE_MAXIMO, LIMITE_PADRAO, filtrar_prefixo
+
+
+class AutocompletarMixin:
+    """
+    Adiciona a ação `autocompletar` (?q=&limite=) a um ViewSet.
+
+    Devolve os primeiros `limite` registros cujo `campo_autocompletar` começa
+    com `q`, usando `autocompletar_serializer_class`.
+    """
+    campo_autocompletar = 'nome_busca'
+    autocompletar_serializer_class = None
+
+    @action(detail=False, methods=['get'])
+    def autocompletar(self, request):
+        """Primeiros registros cujo nome começa com ?q= (sem acentos e sem diferenciar maiúsculas)"""
+        try:
+            limite = int(request.query_params.get('limite', LIMITE_PADRAO))
+        except ValueError:
+            limite = LIMITE_PADRAO
+        limite = max(1, min(limite, LIMITE_MAXIMO))
+
+        registros = filtrar_prefixo(
+            self.get_queryset(), self.campo_autocompletar, request.query_params.get('q', '')
+        )[:limite]
+        serializer = self.autocompletar_serializer_class(registros, many=True)
+        return Response(serializer.data)
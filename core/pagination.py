@@ -0,0 +1,135 @@
+"""
+Classes de paginação da API
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por chave (keyset) sobre (campo_ordenacao, pk).
+
+    Cada página é uma varredura de intervalo a partir da posição do último
+    registro, sem OFFSET e sem COUNT(*). O cursor é opaco e guarda apenas essa
+    posição, então os filtros da query string continuam valendo entre páginas.
+    A ordem é decrescente, a não ser que ?ordering=<campo_ordenacao> seja usado.
+    """
+    campo_ordenacao = None
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.campo = queryset.model._meta.get_field(self.campo_ordenacao)
+        posicao = self.decodificar_cursor(request)
+
+        self.crescente = request.query_params.get('ordering') == self.campo_ordenacao
+        voltando = bool(posicao and posicao['anterior'])
+        # Ao voltar uma página a varredura acontece no sentido oposto
+        decrescente = self.crescente == voltando
+        sinal = '-' if decrescente else ''
+        queryset = queryset.order_by(f'{sinal}{self.campo.name}', f'{sinal}pk')
+
+        if posicao:
+            operador = 'lt' if decrescente else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.campo.name}__{operador}': posicao['valor']})
+                | Q(**{self.campo.name: posicao['valor'], f'pk__{operador}': posicao['pk']})
+            )
+
+        registros = list(queryset[:self.page_size + 1])
+        ha_mais = len(registros) > self.page_size
+        registros = registros[:self.page_size]
+        if voltando:
+            registros.reverse()
+            self.tem_anterior, self.tem_proxima = ha_mais, True
+        else:
+            self.tem_anterior, self.tem_proxima = posicao is not None, ha_mais
+
+        self.registros = registros
+        return registros
+
+    def get_page_size(self, request):
+        try:
+            tamanho = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(tamanho, self.max_page_size))
+
+    def decodificar_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            dados = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return {
+                'valor': self.campo.to_python(dados['v']),
+                'pk': int(dados['p']),
+                'anterior': bool(dados.get('a')),
+            }
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def codificar_cursor(self, registro, anterior=False):
+        valor = self.campo.value_to_string(registro)
+        dados = {'v': valor, 'p': registro.pk}
+        if anterior:
+            dados['a'] = 1
+        cursor = base64.urlsafe_b64encode(json.dumps(dados, separators=(',', ':')).encode())
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor.decode('ascii'))
+
+    def get_next_link(self):
+        if not (self.tem_proxima and self.registros):
+            return None
+        return self.codificar_cursor(self.registros[-1])
+
+    def get_previous_link(self):
+        if not (self.tem_anterior and self.registros):
+            return None
+        return self.codificar_cursor(self.registros[0], anterior=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class PaginacaoHibrida(PageNumberPagination):
+    """
+    Paginação por número de página por padrão, ou por cursor (keyset_class)
+    quando a requisição envia ?paginacao=cursor ou um ?cursor=.
+    """
+    keyset_class = None
+
+    def usar_cursor(self, request):
+        return (
+            request.query_params.get('paginacao') == 'cursor'
+            or 'cursor' in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.keyset_class() if self.usar_cursor(request) else None
+        if self.keyset:
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,5 +1,8 @@
 from django.contrib import admin
+from django.db import transaction
 from .models import Pedido, PedidoItem
+from .signals import itens_alterados
+from .totais import adiar_totais, recalcular_totais
 
 
 class PedidoItemInline(admin.TabularInline):
@@ -29,6 +32,11 @@ class PedidoAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         })
     )
+    
+    def save_related(self, request, form, formsets, change):
+        # Recalcular o total uma única vez para todas as linhas do inline
+        with adiar_totais():
+            super().save_related(request, form, formsets, change)
 
 
 @admin.register(PedidoItem)
@@ -37,3 +45,18 @@ class PedidoItemAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['pedido__numero', 'produto__nome']
     readonly_fields = ['valor_total', 'created_at', 'updated_at']
+    
+    def save_model(self, request, obj, form, change):
+        with adiar_totais():
+            super().save_model(request, obj, form, change)
+    
+    def delete_model(self, request, obj):
+        with adiar_totais():
+            super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        removidos = list(queryset.only('pedido_id', 'produto_id', 'quantidade', 'valor_total'))
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            itens_alterados.send(sender=PedidoItem, antes=removidos, depois=[], using=queryset.db)
+            recalcular_totais({item.pedido_id for item in removidos})
@@ -0,0 +1,30 @@
+"""
+Busca de pedidos pelo número ou pelo cliente
+"""
+from django.db.models import Case, FloatField, Q, Value, When
+
+from clientes.models import Cliente
+from core.busca_textual import ids_encontrados, palavras
+from .numeracao import alocador_pedidos
+
+
+def buscar_pedidos(queryset, termo):
+    """
+    Pedidos cujo número começa com o termo ou cujo cliente corresponde a ele.
+
+    O cliente é resolvido pelo índice de busca de clientes e o filtro nos
+    pedidos usa cliente_id, sem varrer a junção. O número exato vem primeiro.
+    """
+    if not palavras(termo):
+        return queryset
+
+    condicao = Q(cliente_id__in=ids_encontrados(Cliente, termo, queryset.db))
+    relevancia = Value(0.0, output_field=FloatField())
+    digitos = termo.strip().lstrip('#')
+    if digitos.isdigit():
+        prefixo = alocador_pedidos.prefixo + digitos
+        exato = Q(numero=alocador_pedidos.formatar(int(digitos)))
+        condicao |= exato | Q(numero__gte=prefixo, numero__lt=prefixo + '\uffff')
+        relevancia = Case(When(exato, then=Value(1.0)), default=Value(0.0), output_field=FloatField())
+
+    return queryset.filter(condicao).annotate(relevancia=relevancia)
@@ -0,0 +1,90 @@
+"""
+Exportação de pedidos em streaming (NDJSON e CSV)
+"""
+import csv
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils import timezone
+
+from .models import PedidoItem
+
+
+CAMPOS_PEDIDO = [
+    'id', 'numero', 'cliente_id', 'cliente_nome', 'status',
+    'subtotal', 'frete', 'total', 'metodo_envio',
+    'endereco_cep', 'endereco_cidade', 'endereco_uf', 'endereco_rua',
+    'endereco_numero', 'endereco_complemento', 'data_pedido',
+]
+CAMPOS_ITEM = ['produto_id', 'produto_nome', 'quantidade', 'preco_unitario', 'valor_total']
+
+
+def iterar_pedidos(queryset, incluir_itens=False, chunk_size=2000):
+    """
+    Percorre o queryset em blocos de `chunk_size` linhas como dicionários.
+
+    Com `incluir_itens`, os itens de cada bloco são buscados em uma única
+    consulta; a memória usada depende do tamanho do bloco, não do total.
+    """
+    linhas = (
+        queryset.prefetch_related(None)
+        .values(*[campo for campo in CAMPOS_PEDIDO if campo != 'cliente_nome'],
+                cliente_nome=F('cliente__nome'))
+        .iterator(chunk_size=chunk_size)
+    )
+    while True:
+        bloco = list(islice(linhas, chunk_size))
+        if not bloco:
+            return
+        if incluir_itens:
+            itens = {}
+            for item in (
+                PedidoItem.objects.filter(pedido_id__in=[pedido['id'] for pedido in bloco])
+                .order_by('id')
+                .values('pedido_id', *[campo for campo in CAMPOS_ITEM if campo != 'produto_nome'],
+                        produto_nome=F('produto__nome'))
+            ):
+                itens.setdefault(item.pop('pedido_id'), []).append(item)
+        for pedido in bloco:
+            pedido['data_pedido'] = timezone.localtime(pedido['data_pedido']).isoformat()
+            if incluir_itens:
+                pedido['itens'] = itens.get(pedido['id'], [])
+            yield pedido
+
+
+def exportar_ndjson(queryset, incluir_itens=False, chunk_size=2000):
+    """Um pedido por linha, em JSON"""
+    for pedido in iterar_pedidos(queryset, incluir_itens, chunk_size):
+        yield json.dumps(pedido, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+class _Eco:
+    """Arquivo falso que devolve o que o csv.writer escreveria"""
+
+    def write(self, valor):
+        return valor
+
+
+def exportar_csv(queryset, incluir_itens=False, chunk_size=2000):
+    """CSV com uma linha por pedido, ou uma linha por item quando `incluir_itens`"""
+    escritor = csv.writer(_Eco())
+    cabecalho = CAMPOS_PEDIDO + (CAMPOS_ITEM if incluir_itens else [])
+    yield escritor.writerow(cabecalho)
+
+    vazio = [None] * len(CAMPOS_ITEM)
+    for pedido in iterar_pedidos(queryset, incluir_itens, chunk_size):
+        colunas = [pedido[campo] for campo in CAMPOS_PEDIDO]
+        if not incluir_itens:
+            yield escritor.writerow(colunas)
+            continue
+        for item in pedido['itens'] or [None]:
+            valores = [item[campo] for campo in CAMPOS_ITEM] if item else vazio
+            yield escritor.writerow(colunas + valores)
+
+
+EXPORTADORES = {
+    'ndjson': (exportar_ndjson, 'application/x-ndjson'),
+    'csv': (exportar_csv, 'text/csv'),
+}
@@ -0,0 +1,168 @@
+"""
+Importação de pedidos em lote a partir de NDJSON ou CSV
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from clientes.models import Cliente
+from core.importacao import ResultadoImportacao, em_lotes, ler_registros
+from produtos.services import resolver_produtos
+from .models import Pedido, PedidoItem
+from .numeracao import alocador_pedidos
+from .serializers import PedidoImportacaoSerializer
+from .services import montar_item
+from .signals import pedidos_alterados_em_lote
+
+
+CAMPOS_ITEM_CSV = ('produto', 'quantidade', 'preco_unitario')
+
+
+def agrupar_linhas_csv(registros):
+    """
+    Converte linhas de CSV (uma por item) em pedidos com lista de itens.
+
+    Linhas consecutivas com a mesma `referencia` formam um único pedido;
+    sem referência, cada linha é um pedido de um item.
+    """
+    atual = None
+    for linha, dados, erro in registros:
+        if erro:
+            yield linha, None, erro
+            continue
+        dados = {campo: valor for campo, valor in dados.items() if valor not in ('', None)}
+        item = {campo: dados.pop(campo) for campo in CAMPOS_ITEM_CSV if campo in dados}
+        referencia = dados.get('referencia')
+
+        if atual and referencia and atual[1].get('referencia') == referencia:
+            atual[1]['itens'].append(item)
+            continue
+        if atual:
+            yield atual
+        dados['itens'] = [item] if item else []
+        atual = (linha, dados, None)
+    if atual:
+        yield atual
+
+
+def ler_pedidos(arquivo, formato):
+    """Gera (linha, pedido, erro) a partir de um arquivo NDJSON ou CSV"""
+    registros = ler_registros(arquivo, formato)
+    if formato == 'csv':
+        registros = agrupar_linhas_csv(registros)
+    return registros
+
+
+def importar_pedidos(registros, tamanho_lote=None, ao_concluir_lote=None):
+    """
+    Valida e grava pedidos em lotes, cada lote em sua própria transação.
+
+    Linhas inválidas são registradas no resultado e não interrompem o
+    restante do arquivo. `ao_concluir_lote(resultado)` é chamado após cada lote.
+    """
+    tamanho_lote = tamanho_lote or getattr(settings, 'IMPORTACAO_TAMANHO_LOTE', 500)
+    resultado = ResultadoImportacao()
+    for lote in em_lotes(registros, tamanho_lote):
+        _importar_lote(lote, resultado)
+        if ao_concluir_lote:
+            ao_concluir_lote(resultado)
+    return resultado
+
+
+def _importar_lote(lote, resultado):
+    # Uma instância só: montar os campos do serializer a cada linha custa mais que validar
+    validador = PedidoImportacaoSerializer()
+    validos = []
+    for linha, dados, erro in lote:
+        resultado.total += 1
+        if erro:
+            resultado.adicionar_erro(linha, erro)
+            continue
+        try:
+            validos.append((linha, validador.run_validation(dados)))
+        except ValidationError as exc:
+            resultado.adicionar_erro(linha, as_serializer_error(exc), dados.get('referencia'))
+
+    # Clientes e produtos do lote inteiro em duas consultas
+    clientes = set(
+        Cliente.objects.filter(pk__in={dados['cliente_id'] for _, dados in validos})
+        .values_list('pk', flat=True)
+    )
+    produtos, _ = resolver_produtos(
+        item['produto_id'] for _, dados in validos for item in dados['itens']
+    )
+
+    pedidos = []
+    for linha, dados in validos:
+        referencia = dados.pop('referencia', None)
+        erros = _verificar_relacionados(dados, clientes, produtos)
+        if erros:
+            resultado.adicionar_erro(linha, erros, referencia)
+            continue
+        pedidos.append((linha, referencia, dados))
+
+    if not pedidos:
+        return
+
+    try:
+        with transaction.atomic():
+            _gravar_pedidos([dados for _, _, dados in pedidos], produtos)
+    except DatabaseError as exc:
+        for linha, referencia, _ in pedidos:
+            resultado.adicionar_erro(linha, f'Erro ao gravar o lote: {exc}', referencia)
+        return
+    resultado.importados += len(pedidos)
+
+
+def _verificar_relacionados(dados, clientes, produtos):
+    erros = {}
+    if dados['cliente_id'] not in clientes:
+        erros['cliente'] = [f"Cliente {dados['cliente_id']} não encontrado."]
+    erros_itens = []
+    for item in dados['itens']:
+        produto = produtos.get(item['produto_id'])
+        if produto is None:
+            erros_itens.append(f"Produto {item['produto_id']} não encontrado.")
+        elif not produto.ativo:
+            erros_itens.append(f"Produto {item['produto_id']} inativo.")
+    if erros_itens:
+        erros['itens'] = erros_itens
+    return erros
+
+
+def _gravar_pedidos(pedidos_data, produtos):
+    """Reserva os números e insere pedidos e itens com um bulk_create por tabela"""
+    numeros = alocador_pedidos.reservar(len(pedidos_data))
+    pedidos, itens = [], []
+    for numero, dados in zip(numeros, pedidos_data):
+        itens_data = dados.pop('itens')
+        pedido = Pedido(numero=numero, **dados)
+        itens_pedido = [
+            montar_item(
+                pedido,
+                produtos[item['produto_id']],
+                item['quantidade'],
+                item.get('preco_unitario'),
+            )
+            for item in itens_data
+        ]
+        pedido.subtotal = sum((item.valor_total for item in itens_pedido), Decimal('0.00'))
+        pedido.total = pedido.subtotal + Decimal(str(pedido.frete))
+        pedidos.append(pedido)
+        itens.append(itens_pedido)
+
+    Pedido.objects.bulk_create(pedidos)
+    for pedido, itens_pedido in zip(pedidos, itens):
+        for item in itens_pedido:
+            item.pedido = pedido
+    PedidoItem.objects.bulk_create([item for itens_pedido in itens for item in itens_pedido])
+    pedidos_alterados_em_lote.send(
+        sender=Pedido,
+        pedido_ids=[pedido.pk for pedido in pedidos],
+        using=pedidos[0]._state.db,
+        criados=True,
+    )
+    return pedidos
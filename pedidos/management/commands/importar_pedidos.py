@@ -0,0 +1,44 @@
+"""
+Importação de pedidos em lote a partir de NDJSON ou CSV
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importacao import FORMATOS, detectar_formato
+from pedidos.importacao import importar_pedidos, ler_pedidos
+
+
+class Command(BaseCommand):
+    help = 'Importa pedidos com itens de um arquivo NDJSON ou CSV, em lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+        parser.add_argument('--formato', choices=FORMATOS)
+        parser.add_argument('--lote', type=int, help='Pedidos por transação')
+        parser.add_argument('--max-erros', type=int, default=20, help='Erros exibidos ao final')
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or detectar_formato(options['arquivo'])
+        try:
+            arquivo = open(options['arquivo'], 'rb')
+        except OSError as exc:
+            raise CommandError(f'Não foi possível abrir o arquivo: {exc}')
+
+        with arquivo:
+            resultado = importar_pedidos(
+                ler_pedidos(arquivo, formato),
+                tamanho_lote=options['lote'],
+                ao_concluir_lote=self.exibir_progresso,
+            )
+
+        for erro in resultado.erros[:options['max_erros']]:
+            self.stderr.write(f"Linha {erro['linha']}: {erro['erros']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado.importados} pedidos importados, {resultado.com_erro} com erro, '
+            f'{resultado.total} linhas em {resultado.duracao:.1f}s '
+            f'({resultado.linhas_por_segundo} linhas/s)'
+        ))
+
+    def exibir_progresso(self, resultado):
+        self.stdout.write(
+            f'{resultado.total} linhas processadas ({resultado.linhas_por_segundo} linhas/s)'
+        )
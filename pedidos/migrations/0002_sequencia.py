@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:49
+
+from django.db import migrations, models
+
+
+def criar_sequencia_pedidos(apps, schema_editor):
+    """Inicia a sequência a partir do maior número de pedido existente"""
+    Pedido = apps.get_model('pedidos', 'Pedido')
+    Sequencia = apps.get_model('pedidos', 'Sequencia')
+    db_alias = schema_editor.connection.alias
+    numeros = Pedido.objects.using(db_alias).filter(
+        numero__startswith='#'
+    ).values_list('numero', flat=True)
+    ultimo = max((int(numero[1:]) for numero in numeros if numero[1:].isdigit()), default=0)
+    Sequencia.objects.using(db_alias).get_or_create(nome='pedidos', defaults={'valor': ultimo})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequencia',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('nome', models.CharField(max_length=50, unique=True)),
+                ('valor', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Sequência',
+                'verbose_name_plural': 'Sequências',
+                'db_table': 'sequencias',
+            },
+        ),
+        migrations.RunPython(criar_sequencia_pedidos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0002_sequencia'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['cliente', 'data_pedido'], name='pedidos_cliente_153b5e_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:49
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0003_indice_cliente_data'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pedido',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=12, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+    ]
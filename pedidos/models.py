@@ -1,8 +1,23 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.core.validators import MinValueValidator
 from clientes.models import Cliente
 from produtos.models import Produto
 from accounts.models import Usuario
+from .signals import itens_alterados, pedido_relido
+
+class Sequencia(models.Model):
+    """Contador persistente usado para numeração de documentos"""
+    id = models.AutoField(primary_key=True)
+    nome = models.CharField(max_length=50, unique=True)
+    valor = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'sequencias'
+        verbose_name = 'Sequência'
+        verbose_name_plural = 'Sequências'
+    
+    def __str__(self):
+        return f"{self.nome} ({self.valor})"
 
 class Pedido(models.Model):
     class StatusChoices(models.TextChoices):
@@ -66,6 +81,7 @@ class Pedido(models.Model):
         indexes = [
             models.Index(fields=['numero']),
             models.Index(fields=['cliente', 'status']),
+            models.Index(fields=['cliente', 'data_pedido']),
             models.Index(fields=['data_pedido', 'status']),
             models.Index(fields=['total']),
         ]
@@ -75,30 +91,29 @@ class Pedido(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.numero:
-            # Gerar número único do pedido
-            ultimo_pedido = Pedido.objects.filter(
-                numero__startswith='#'
-            ).order_by('-numero').first()
-            
-            if ultimo_pedido:
-                ultimo_numero = int(ultimo_pedido.numero[1:])
-                self.numero = f"#{ultimo_numero + 1:05d}"
-            else:
-                self.numero = "#00001"
+            # Gerar número único do pedido a partir do bloco reservado pelo worker
+            from .numeracao import alocador_pedidos
+            using = kwargs.get('using') or router.db_for_write(Pedido, instance=self)
+            self.numero = alocador_pedidos.proximo(using=using)
         
         # Calcular total baseado no frete se não foi definido
         if not self.total or self.total == 0:
             from decimal import Decimal
             self.total = self.subtotal + Decimal(str(self.frete))
         
-        super().save(*args, **kwargs)
+        # As vendas consolidadas são ajustadas no post_save, na mesma transação
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+    
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        pedido_relido.send(sender=Pedido, instance=self, fields=fields)
     
     def calcular_total(self):
         """Calcula o total baseado nos itens"""
-        from decimal import Decimal
-        self.subtotal = sum(item.valor_total for item in self.itens.all())
-        self.total = self.subtotal + Decimal(str(self.frete))
-        self.save(update_fields=['subtotal', 'total'])
+        from .totais import recalcular_totais
+        recalcular_totais([self.pk], using=self._state.db or 'default')
+        self.refresh_from_db(fields=['subtotal', 'total'])
     
     @property
     def endereco_completo(self):
@@ -157,8 +172,24 @@ class PedidoItem(models.Model):
     def save(self, *args, **kwargs):
         # Calcular valor total automaticamente
         self.valor_total = self.quantidade * self.preco_unitario
-        super().save(*args, **kwargs)
-        
-        # Atualizar total do pedido apenas se não estamos em uma operação bulk
-        if not kwargs.get('update_fields'):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            
+            # Atualizar total do pedido apenas se não estamos em uma operação bulk
+            if not kwargs.get('update_fields'):
+                self._atualizar_total_pedido()
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            resultado = super().delete(*args, **kwargs)
+            itens_alterados.send(
+                sender=PedidoItem, antes=[self], depois=[], using=self._state.db
+            )
+            self._atualizar_total_pedido()
+        return resultado
+    
+    def _atualizar_total_pedido(self):
+        """Recalcula o pedido agora ou no fim do escopo de adiar_totais()"""
+        from .totais import marcar_pedido
+        if not marcar_pedido(self.pedido_id):
             self.pedido.calcular_total()
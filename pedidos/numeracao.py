@@ -0,0 +1,113 @@
+"""
+Alocação de números sequenciais para pedidos
+"""
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+
+class AlocadorNumeracao:
+    """
+    Distribui números sequenciais reservando blocos na tabela de sequências.
+
+    Cada processo reserva um bloco com um único UPDATE no contador e entrega os
+    números em memória até o bloco acabar, sem consultar a tabela de pedidos.
+    A sobra do bloco só fica disponível para outras requisições depois do
+    commit da transação que o reservou: se ela for revertida o contador volta
+    junto e nenhum número é entregue duas vezes.
+    """
+
+    def __init__(self, nome, prefixo='#', largura=5, tamanho_bloco=None, valor_inicial=None):
+        self.nome = nome
+        self.prefixo = prefixo
+        self.largura = largura
+        self._tamanho_bloco = tamanho_bloco
+        self._valor_inicial = valor_inicial
+        self._reiniciar()
+        # Blocos herdados do processo pai (gunicorn --preload) não podem ser reutilizados
+        os.register_at_fork(after_in_child=self._reiniciar)
+
+    def _reiniciar(self):
+        self._lock = threading.Lock()
+        self._blocos = {}
+
+    @property
+    def tamanho_bloco(self):
+        return self._tamanho_bloco or getattr(settings, 'PEDIDO_NUMERO_BLOCO', 20)
+
+    def formatar(self, valor):
+        return f"{self.prefixo}{valor:0{self.largura}d}"
+
+    def proximo(self, using='default'):
+        """Retorna o próximo número formatado"""
+        return self.reservar(1, using=using)[0]
+
+    def reservar(self, quantidade, using='default'):
+        """Retorna uma lista com `quantidade` números formatados"""
+        valores = self._retirar(quantidade, using)
+        faltam = quantidade - len(valores)
+        if faltam:
+            tamanho = max(faltam, self.tamanho_bloco)
+            inicio = self._reservar_bloco(tamanho, using)
+            valores.extend(range(inicio, inicio + faltam))
+            sobra = (inicio + faltam, inicio + tamanho)
+            if sobra[0] < sobra[1]:
+                transaction.on_commit(lambda: self._devolver(sobra, using), using=using)
+        return [self.formatar(valor) for valor in valores]
+
+    def _retirar(self, quantidade, using):
+        """Consome até `quantidade` valores dos blocos já confirmados"""
+        valores = []
+        with self._lock:
+            blocos = self._blocos.get(using)
+            while blocos and len(valores) < quantidade:
+                inicio, fim = blocos[0]
+                n = min(fim - inicio, quantidade - len(valores))
+                valores.extend(range(inicio, inicio + n))
+                if inicio + n < fim:
+                    blocos[0] = (inicio + n, fim)
+                else:
+                    blocos.popleft()
+        return valores
+
+    def _devolver(self, bloco, using):
+        with self._lock:
+            self._blocos.setdefault(using, deque()).append(bloco)
+
+    def _reservar_bloco(self, tamanho, using):
+        """Avança o contador em `tamanho` e retorna o primeiro valor do bloco"""
+        from .models import Sequencia
+
+        with transaction.atomic(using=using):
+            # O UPDATE vem antes da leitura: ele é quem adquire o lock da linha
+            # (PostgreSQL) ou do banco (SQLite), então a leitura seguinte não
+            # pode ver o valor de outro worker.
+            sequencia = Sequencia.objects.using(using).filter(nome=self.nome)
+            if not sequencia.update(valor=F('valor') + tamanho):
+                valor_inicial = self._valor_inicial(using) if self._valor_inicial else 0
+                Sequencia.objects.using(using).get_or_create(
+                    nome=self.nome, defaults={'valor': valor_inicial}
+                )
+                sequencia.update(valor=F('valor') + tamanho)
+            fim = sequencia.values_list('valor', flat=True).get()
+        return fim - tamanho + 1
+
+
+def ultimo_numero_pedido(using='default'):
+    """Maior número já usado em pedidos (usado apenas para iniciar a sequência)"""
+    from .models import Pedido
+
+    numeros = Pedido.objects.using(using).filter(
+        numero__startswith='#'
+    ).values_list('numero', flat=True)
+    return max(
+        (int(numero[1:]) for numero in numeros.iterator() if numero[1:].isdigit()),
+        default=0
+    )
+
+
+alocador_pedidos = AlocadorNumeracao('pedidos', valor_inicial=ultimo_numero_pedido)
@@ -1,11 +1,54 @@
 from rest_framework import serializers
-from django.db import transaction
 from .models import Pedido, PedidoItem
+from .services import criar_pedido, sincronizar_itens
+from .totais import adiar_totais, marcar_pedido
 from clientes.serializers import ClienteSelectSerializer
+from produtos.models import Produto
 from produtos.serializers import ProdutoSelectSerializer
+from produtos.services import resolver_produtos
+
+
+class ProdutoItemField(serializers.PrimaryKeyRelatedField):
+    """Usa os produtos já resolvidos pela lista de itens, quando houver"""
+
+    def to_internal_value(self, data):
+        lista = getattr(self.parent, 'parent', None)
+        produtos = getattr(lista, 'produtos', None)
+        if produtos is not None:
+            try:
+                return produtos[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+class PedidoItemListSerializer(serializers.ListSerializer):
+    """
+    Resolve os produtos de todos os itens de uma vez (catálogo em memória ou uma consulta)
+
+    Na atualização, produtos que já estão no pedido continuam aceitos mesmo
+    se foram inativados depois; só não podem entrar como itens novos.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            ids = set()
+            for item in data:
+                try:
+                    ids.add(int(item['produto']))
+                except (KeyError, TypeError, ValueError):
+                    # Itens malformados são reportados pela validação do item
+                    continue
+            pedido = getattr(self.parent, 'instance', None)
+            no_pedido = {item.produto_id for item in pedido.itens.all()} if pedido else set()
+            self.produtos, erros = resolver_produtos(ids, inativos_permitidos=no_pedido)
+            if erros:
+                raise serializers.ValidationError(erros)
+        return super().to_internal_value(data)
 
 
 class PedidoItemSerializer(serializers.ModelSerializer):
+    produto = ProdutoItemField(queryset=Produto.objects.all())
     produto_nome = serializers.CharField(source='produto.nome', read_only=True)
     produto_preco = serializers.DecimalField(source='produto.preco', max_digits=10, decimal_places=2, read_only=True)
     
@@ -16,6 +59,7 @@ class PedidoItemSerializer(serializers.ModelSerializer):
             'quantidade', 'preco_unitario', 'valor_total'
         ]
         read_only_fields = ['id', 'valor_total']
+        list_serializer_class = PedidoItemListSerializer
 
     def validate_quantidade(self, value):
         if value <= 0:
@@ -81,79 +125,49 @@ class PedidoCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("O frete não pode ser negativo.")
         return value
 
-    @transaction.atomic
     def create(self, validated_data):
         itens_data = validated_data.pop('itens')
-        
-        # Calcular subtotal com base nos itens
-        from decimal import Decimal
-        subtotal = Decimal('0.00')
-        for item_data in itens_data:
-            preco_unitario = item_data.get('preco_unitario', item_data['produto'].preco)
-            quantidade = item_data['quantidade']
-            subtotal += Decimal(str(preco_unitario)) * quantidade
-        
-        # Definir valores calculados
-        validated_data['subtotal'] = subtotal
-        frete = Decimal(str(validated_data.get('frete', 0)))
-        validated_data['total'] = subtotal + frete
-        
-        # Criar o pedido com total calculado
-        pedido = Pedido.objects.create(**validated_data)
-        
-        # Criar os itens
-        for item_data in itens_data:
-            # Se o preço unitário não foi fornecido, usar o preço do produto
-            if 'preco_unitario' not in item_data:
-                item_data['preco_unitario'] = item_data['produto'].preco
-            
-            PedidoItem.objects.create(pedido=pedido, **item_data)
-        return pedido
+        return criar_pedido(itens_data, **validated_data)
+
+
+class PedidoItemImportacaoSerializer(serializers.ModelSerializer):
+    """Item de pedido importado; o produto é resolvido em lote pelo importador"""
+    produto = serializers.IntegerField(source='produto_id')
+    
+    class Meta:
+        model = PedidoItem
+        fields = ['produto', 'quantidade', 'preco_unitario']
+        extra_kwargs = {'preco_unitario': {'required': False}}
 
 
-class PedidoUpdateSerializer(serializers.ModelSerializer):
-    """Serializer para atualização de pedidos"""
-    itens = PedidoItemSerializer(many=True, required=False)
+class PedidoImportacaoSerializer(serializers.ModelSerializer):
+    """Valida uma linha da importação em lote sem consultar o banco"""
+    referencia = serializers.CharField(required=False, allow_blank=True)
+    cliente = serializers.IntegerField(source='cliente_id')
+    itens = PedidoItemImportacaoSerializer(many=True)
     
     class Meta:
         model = Pedido
         fields = [
-            'cliente', 'frete', 'metodo_envio',
-            'endereco_cep', 'endereco_cidade', 'endereco_uf', 
+            'referencia', 'cliente', 'status', 'frete', 'metodo_envio',
+            'endereco_cep', 'endereco_cidade', 'endereco_uf',
             'endereco_rua', 'endereco_numero', 'endereco_complemento',
             'itens'
         ]
 
+    def validate_itens(self, value):
+        if not value:
+            raise serializers.ValidationError("O pedido deve ter pelo menos um item.")
+        produtos = [item['produto_id'] for item in value]
+        if len(produtos) != len(set(produtos)):
+            raise serializers.ValidationError("O mesmo produto aparece em mais de um item.")
+        return value
+
     def validate_frete(self, value):
         if value < 0:
             raise serializers.ValidationError("O frete não pode ser negativo.")
         return value
 
-    @transaction.atomic
-    def update(self, instance, validated_data):
-        itens_data = validated_data.pop('itens', None)
-        
-        # Atualizar dados do pedido
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # Se itens foram fornecidos, atualizar
-        if itens_data is not None:
-            # Remover itens existentes
-            instance.itens.all().delete()
-            
-            # Criar novos itens
-            for item_data in itens_data:
-                if 'preco_unitario' not in item_data:
-                    item_data['preco_unitario'] = item_data['produto'].preco
-                
-                PedidoItem.objects.create(pedido=instance, **item_data)
-        
-        # Recalcular total
-        instance.calcular_total()
-        return instance
-
 
 class PedidoPendenteSerializer(serializers.ModelSerializer):
     """Serializer para pedidos pendentes"""
@@ -185,3 +199,32 @@ class PedidoSerializer(serializers.ModelSerializer):
         model = Pedido
         fields = '__all__'
         read_only_fields = ['id', 'numero', 'total', 'created_at', 'updated_at']
+
+
+class PedidoUpdateSerializer(PedidoSerializer):
+    """
+    Atualização de pedidos: mesmos campos e resposta do PedidoSerializer,
+    com `itens` opcional reconciliado por produto (sincronizar_itens)
+    """
+    itens = PedidoItemSerializer(many=True, required=False, write_only=True)
+
+    class Meta(PedidoSerializer.Meta):
+        pass
+
+    def update(self, instance, validated_data):
+        itens_data = validated_data.pop('itens', None)
+        
+        # Itens e pedido na mesma transação; o total é recalculado uma vez, no fim
+        with adiar_totais(using=instance._state.db or 'default'):
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            
+            # Se itens foram fornecidos, aplicar apenas as diferenças
+            if itens_data is not None:
+                sincronizar_itens(instance, itens_data)
+            if itens_data is not None or 'frete' in validated_data:
+                marcar_pedido(instance.pk)
+        
+        instance.refresh_from_db(fields=['subtotal', 'total'])
+        return instance
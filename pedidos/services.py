@@ -0,0 +1,89 @@
+"""
+Operações de escrita de pedidos em lote
+"""
+from copy import copy
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Pedido, PedidoItem
+from .signals import itens_alterados
+
+
+def montar_item(pedido, produto, quantidade, preco_unitario=None):
+    """Instancia um PedidoItem (sem salvar) com o valor total já calculado"""
+    if preco_unitario is None:
+        preco_unitario = produto.preco
+    return PedidoItem(
+        pedido=pedido,
+        produto=produto,
+        quantidade=quantidade,
+        preco_unitario=preco_unitario,
+        valor_total=quantidade * Decimal(str(preco_unitario)),
+    )
+
+
+@transaction.atomic
+def criar_pedido(itens_data, **dados):
+    """
+    Cria o pedido e todos os itens com um INSERT por tabela.
+
+    O subtotal e o total são calculados uma única vez a partir dos itens,
+    sem passar pelo recálculo de PedidoItem.save().
+    """
+    pedido = Pedido(**dados)
+    itens = [montar_item(pedido, **item_data) for item_data in itens_data]
+
+    pedido.subtotal = sum((item.valor_total for item in itens), Decimal('0.00'))
+    pedido.total = pedido.subtotal + Decimal(str(pedido.frete))
+    pedido.save(force_insert=True)
+
+    for item in itens:
+        item.pedido = pedido
+    PedidoItem.objects.bulk_create(itens)
+    itens_alterados.send(sender=PedidoItem, antes=[], depois=itens, using=pedido._state.db)
+    return pedido
+
+
+def sincronizar_itens(pedido, itens_data):
+    """
+    Reconcilia os itens do pedido com a lista recebida, usando o produto como chave.
+
+    Itens iguais não são tocados; alterados, novos e removidos são gravados com
+    um bulk_update, um bulk_create e um DELETE, seguidos de um único
+    `itens_alterados`. O total do pedido não é recalculado aqui.
+    """
+    existentes = {item.produto_id: item for item in pedido.itens.all()}
+    novos, alterados, anteriores = [], [], []
+
+    for item_data in itens_data:
+        item = montar_item(pedido, **item_data)
+        atual = existentes.pop(item.produto_id, None)
+        if atual is None:
+            novos.append(item)
+        elif (atual.quantidade, atual.preco_unitario) != (item.quantidade, item.preco_unitario):
+            anteriores.append(copy(atual))
+            atual.quantidade = item.quantidade
+            atual.preco_unitario = item.preco_unitario
+            atual.valor_total = item.valor_total
+            atual.updated_at = timezone.now()
+            alterados.append(atual)
+
+    # O que sobrou em `existentes` não veio na lista e deve ser removido
+    removidos = list(existentes.values())
+    if removidos:
+        PedidoItem.objects.filter(pk__in=[item.pk for item in removidos]).delete()
+    if alterados:
+        PedidoItem.objects.bulk_update(
+            alterados, ['quantidade', 'preco_unitario', 'valor_total', 'updated_at']
+        )
+    if novos:
+        PedidoItem.objects.bulk_create(novos)
+    if removidos or alterados or novos:
+        itens_alterados.send(
+            sender=PedidoItem,
+            antes=anteriores + removidos,
+            depois=alterados + novos,
+            using=pedido._state.db,
+        )
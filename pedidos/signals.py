@@ -0,0 +1,25 @@
+"""
+Sinais emitidos pelas gravações de pedidos em lote
+
+bulk_create e update() não disparam post_save; quem grava pedidos por esses
+caminhos envia `pedidos_alterados_em_lote` para que caches e agregados
+derivados dos pedidos sejam atualizados. Gravações de itens fora de
+PedidoItem.save() (bulk_create, bulk_update, exclusões) enviam
+`itens_alterados` com as versões anteriores e novas dos itens.
+Pedido.refresh_from_db() envia `pedido_relido`, para quem guarda o estado
+gravado da instância (ex.: os totais relidos depois de recalcular_totais).
+"""
+from django.dispatch import Signal
+
+
+# Argumentos: pedido_ids (lista de ids afetados), using e, quando conhecido, o
+# motivo: criados=True (pedidos recém-inseridos, já com os itens) ou
+# totais_anteriores (pk -> total antes de recalcular_totais)
+pedidos_alterados_em_lote = Signal()
+
+# Argumentos: antes (itens como estavam, ou removidos), depois (itens novos ou
+# alterados), using; cada item tem pedido_id, produto_id, quantidade e valor_total
+itens_alterados = Signal()
+
+# Argumentos: instance, fields (campos relidos, ou None para todos)
+pedido_relido = Signal()
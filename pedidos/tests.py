@@ -0,0 +1,64 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from clientes.models import Cliente
+from .models import Pedido, Sequencia
+from .numeracao import AlocadorNumeracao, alocador_pedidos
+
+
+class NumeracaoPedidosTests(TransactionTestCase):
+    """
+    Numeração em blocos (pedidos/numeracao.py); TransactionTestCase porque a
+    sobra de cada bloco só volta a ser usada no on_commit
+    """
+
+    def setUp(self):
+        # Blocos em memória de um teste anterior não valem para o banco recriado
+        alocador_pedidos._reiniciar()
+
+    def test_processos_nao_repetem_numeros(self):
+        # Cada alocador faz o papel de um worker com seu próprio bloco
+        bloco = 5
+        alocadores = [AlocadorNumeracao('teste', tamanho_bloco=bloco) for _ in range(4)]
+        numeros = []
+        for _ in range(12):
+            for alocador in alocadores:
+                with transaction.atomic():
+                    numeros.append(alocador.proximo())
+
+        valores = sorted(int(numero[1:]) for numero in numeros)
+        self.assertEqual(len(valores), len(set(valores)))
+        # Cada worker pode terminar com a sobra do último bloco sem uso
+        lacunas = valores[-1] - valores[0] + 1 - len(valores)
+        self.assertLessEqual(lacunas, len(alocadores) * (bloco - 1))
+
+    def test_bloco_revertido_nao_fica_em_memoria(self):
+        alocador = AlocadorNumeracao('teste', tamanho_bloco=10)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                revertido = alocador.proximo()
+                raise RuntimeError
+        # O contador voltou com o rollback e a sobra do bloco não foi devolvida
+        self.assertFalse(Sequencia.objects.filter(nome='teste', valor__gt=0).exists())
+        self.assertEqual(alocador.proximo(), revertido)
+        self.assertEqual(alocador.proximo(), '#00002')
+
+    def test_pedidos_recebem_numeros_distintos(self):
+        cliente = Cliente.objects.create(nome='Cliente', email='cliente@vendaspro.local', contato='0')
+        pedidos = [
+            Pedido.objects.create(
+                cliente=cliente,
+                subtotal=Decimal('0.00'),
+                frete=Decimal('0.00'),
+                endereco_cep='00000-000',
+                endereco_cidade='Teste',
+                endereco_uf='SP',
+                endereco_rua='Rua do Teste',
+                endereco_numero='0',
+            )
+            for _ in range(25)
+        ]
+        numeros = [pedido.numero for pedido in pedidos]
+        self.assertEqual(numeros, [f'#{valor:05d}' for valor in range(1, 26)])
@@ -0,0 +1,81 @@
+"""
+Recálculo de subtotal/total de pedidos a partir dos itens
+"""
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .signals import pedidos_alterados_em_lote
+
+
+_estado = threading.local()
+
+
+def recalcular_totais(pedido_ids, using='default'):
+    """Recalcula subtotal e total dos pedidos informados com um único UPDATE"""
+    from .models import Pedido, PedidoItem
+
+    soma_itens = Coalesce(
+        Subquery(
+            PedidoItem.objects.filter(pedido=OuterRef('pk'))
+            .order_by()
+            .values('pedido')
+            .annotate(soma=Sum('valor_total'))
+            .values('soma')
+        ),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    pedido_ids = list(pedido_ids)
+    pedidos = Pedido.objects.using(using).filter(pk__in=pedido_ids)
+    # Os agregados derivados aplicam só a diferença de cada total
+    totais_anteriores = dict(pedidos.values_list('pk', 'total'))
+    atualizados = pedidos.update(
+        subtotal=soma_itens,
+        total=soma_itens + F('frete'),
+    )
+    pedidos_alterados_em_lote.send(
+        sender=Pedido, pedido_ids=pedido_ids, using=using, totais_anteriores=totais_anteriores
+    )
+    return atualizados
+
+
+def marcar_pedido(pedido_id):
+    """
+    Registra o pedido para recálculo no fim do escopo de adiar_totais().
+
+    Retorna False quando não há escopo ativo, indicando que o chamador deve
+    recalcular imediatamente.
+    """
+    pendentes = getattr(_estado, 'pendentes', None)
+    if pendentes is None:
+        return False
+    pendentes.add(pedido_id)
+    return True
+
+
+@contextmanager
+def adiar_totais(using='default'):
+    """
+    Adia o recálculo de totais das escritas em itens feitas dentro do bloco.
+
+    O bloco roda em uma transação; antes do commit os pedidos marcados são
+    recalculados de uma vez. Escopos aninhados são absorvidos pelo mais externo.
+    """
+    if getattr(_estado, 'pendentes', None) is not None:
+        yield
+        return
+
+    _estado.pendentes = set()
+    try:
+        with transaction.atomic(using=using):
+            yield
+            pendentes, _estado.pendentes = _estado.pendentes, None
+            if pendentes:
+                recalcular_totais(pendentes, using=using)
+    finally:
+        _estado.pendentes = None
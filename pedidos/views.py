@@ -2,26 +2,66 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Count, Max, Q
+from django.http import StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from clientes.models import Cliente
+from core.busca_textual import ids_encontrados, palavras
+from core.condicional import gerar_etag, get_condicional
+from core.filters import BuscaTextualFilter
+from core.importacao import FORMATOS, detectar_formato
+from core.pagination import KeysetPagination, PaginacaoHibrida
+from produtos.catalogo import versao_atual
+from relatorios.services import ler_periodo, resumo_por_status, serie_vendas
+from .busca import buscar_pedidos
+from .exportacao import EXPORTADORES
+from .importacao import importar_pedidos, ler_pedidos
 from .models import Pedido, PedidoItem
+from .totais import adiar_totais
 from .serializers import (
     PedidoSerializer, PedidoListSerializer, PedidoCreateSerializer,
-    PedidoDetalhesSerializer, PedidoHistoricoClienteSerializer
+    PedidoDetalhesSerializer, PedidoHistoricoClienteSerializer, PedidoUpdateSerializer
 )
 
 
+def etag_pedido_detalhes(request, pk=None, **kwargs):
+    """Pedido, cliente e itens (quantidade e última alteração) em uma consulta, mais a versão do catálogo"""
+    impressao = (
+        Pedido.objects.filter(pk=pk)
+        .values_list('data_atualizacao', 'cliente__updated_at')
+        .annotate(Max('itens__updated_at'), Count('itens'))
+        .order_by('pk')
+        .first()
+    )
+    if impressao is None:
+        return None
+    return gerar_etag(request, *impressao, versao_atual())
+
+
+class PedidoKeysetPagination(KeysetPagination):
+    campo_ordenacao = 'data_pedido'
+
+
+class PedidoPagination(PaginacaoHibrida):
+    """Página numerada por padrão; ?paginacao=cursor usa keyset em (data_pedido, id)"""
+    keyset_class = PedidoKeysetPagination
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class PedidoViewSet(viewsets.ModelViewSet):
     queryset = Pedido.objects.select_related('cliente').prefetch_related('itens__produto').all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = PedidoPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, BuscaTextualFilter]
     filterset_fields = ['status', 'cliente']
-    search_fields = ['numero', 'cliente__nome']
     ordering_fields = ['data_pedido', 'total', 'numero']
     ordering = ['-data_pedido']
 
+    def buscar(self, queryset, termo):
+        return buscar_pedidos(queryset, termo)
+
     def get_serializer_class(self):
         if self.action == 'create':
             return PedidoCreateSerializer
@@ -29,15 +69,19 @@ class PedidoViewSet(viewsets.ModelViewSet):
             return PedidoListSerializer
         elif self.action == 'detalhes':
             return PedidoDetalhesSerializer
+        elif self.action in ('update', 'partial_update'):
+            return PedidoUpdateSerializer
         return PedidoSerializer
 
     def get_queryset(self):
         queryset = super().get_queryset()
         
-        # Filtro por nome do cliente
+        # Filtro por nome do cliente (pelo índice de busca de clientes)
         nome_cliente = self.request.query_params.get('nome_cliente')
-        if nome_cliente:
-            queryset = queryset.filter(cliente__nome__icontains=nome_cliente)
+        if nome_cliente and palavras(nome_cliente):
+            queryset = queryset.filter(
+                cliente_id__in=ids_encontrados(Cliente, nome_cliente, queryset.db)
+            )
         
         # Filtro por número do pedido
         numero = self.request.query_params.get('numero')
@@ -52,12 +96,55 @@ class PedidoViewSet(viewsets.ModelViewSet):
         return queryset
 
     @action(detail=True, methods=['get'])
+    @get_condicional(etag_pedido_detalhes)
     def detalhes(self, request, pk=None):
         """Detalhes completos do pedido"""
         pedido = self.get_object()
         serializer = PedidoDetalhesSerializer(pedido)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """Exporta os pedidos filtrados em NDJSON ou CSV, em streaming"""
+        formato = request.query_params.get('formato', 'ndjson')
+        if formato not in EXPORTADORES:
+            return Response(
+                {'error': f"Formato inválido. Use: {', '.join(EXPORTADORES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        exportador, content_type = EXPORTADORES[formato]
+        incluir_itens = request.query_params.get('itens', '').lower() in ('1', 'true', 'sim')
+        queryset = self.filter_queryset(self.get_queryset())
+        chunk_size = getattr(settings, 'EXPORTACAO_CHUNK_SIZE', 2000)
+        
+        response = StreamingHttpResponse(
+            exportador(queryset, incluir_itens=incluir_itens, chunk_size=chunk_size),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="pedidos.{formato}"'
+        return response
+
+    @action(detail=False, methods=['post'])
+    def importar(self, request):
+        """Importa pedidos em lote a partir de um arquivo NDJSON ou CSV"""
+        arquivo = request.FILES.get('arquivo')
+        if not arquivo:
+            return Response(
+                {'error': 'Envie o arquivo no campo "arquivo"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        formato = request.query_params.get('formato') or detectar_formato(arquivo.name)
+        if formato not in FORMATOS:
+            return Response(
+                {'error': f"Formato inválido. Use: {', '.join(FORMATOS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        resultado = importar_pedidos(ler_pedidos(arquivo, formato))
+        return Response(resultado.como_dict())
+
     @action(detail=True, methods=['patch'])
     def alterar_status(self, request, pk=None):
         """Altera o status de um pedido"""
@@ -70,7 +157,7 @@ class PedidoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if novo_status not in [choice[0] for choice in Pedido.STATUS_CHOICES]:
+        if novo_status not in [choice[0] for choice in Pedido.StatusChoices.choices]:
             return Response(
                 {'error': 'Status inválido'}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -95,33 +182,37 @@ class PedidoViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def por_status(self, request):
         """Agrupamento de pedidos por status"""
-        dados = {}
-        for status_choice in Pedido.STATUS_CHOICES:
-            status_key = status_choice[0]
-            status_label = status_choice[1]
-            count = self.get_queryset().filter(status=status_key).count()
-            dados[status_key] = {
-                'label': status_label,
-                'count': count
-            }
+        # Sem filtros na query string o resumo geral (em cache) é suficiente
+        queryset = self.filter_queryset(self.get_queryset()) if request.query_params else None
+        dados = resumo_por_status(queryset)
         return Response(dados)
 
     @action(detail=False, methods=['get'])
     def historico_vendas(self, request):
-        """Histórico de vendas (para dashboard)"""
-        from django.db.models import Sum, Count
-        from datetime import datetime, timedelta
-        
-        # Dados dos últimos 30 dias
-        data_inicio = datetime.now().date() - timedelta(days=30)
-        
-        vendas = self.get_queryset().filter(
-            data_pedido__gte=data_inicio
-        ).values('data_pedido').annotate(
-            total_vendas=Sum('total'),
-            quantidade_pedidos=Count('id')
-        ).order_by('data_pedido')
+        """Histórico de vendas (para dashboard), agrupado por dia, semana ou mês"""
+        granularidade = request.query_params.get('granularidade', 'dia')
+        # Sem outros filtros a série vem da tabela consolidada de vendas diárias
+        filtros = set(request.query_params) - {'data_inicio', 'data_fim', 'granularidade'}
+        queryset = self.filter_queryset(self.get_queryset()) if filtros else None
+        try:
+            data_inicio, data_fim = ler_periodo(request.query_params)
+            serie = serie_vendas(data_inicio, data_fim, granularidade, queryset=queryset)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
+        return Response({
+            'data_inicio': data_inicio,
+            'data_fim': data_fim,
+            'granularidade': granularidade,
+            'vendas': [
+                {
+                    'data': item['periodo'],
+                    'total_vendas': float(item['valor_total']),
+                    'quantidade_pedidos': item['quantidade_pedidos']
+                }
+                for item in serie
+            ]
+        })
 
 
 class PedidoItemViewSet(viewsets.ModelViewSet):
@@ -132,3 +223,15 @@ class PedidoItemViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         from .serializers import PedidoItemSerializer
         return PedidoItemSerializer
+
+    def perform_create(self, serializer):
+        with adiar_totais():
+            serializer.save()
+
+    def perform_update(self, serializer):
+        with adiar_totais():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with adiar_totais():
+            instance.delete()
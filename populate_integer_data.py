@@ -14,6 +14,7 @@ django.setup()
 from clientes.models import Cliente
 from produtos.models import Produto
 from pedidos.models import Pedido, PedidoItem
+from pedidos.totais import adiar_totais
 from accounts.models import Usuario
 
 def criar_dados_teste():
@@ -144,4 +145,6 @@ def criar_dados_teste():
     print("\n✅ Dados de teste criados com sucesso!")
 
 if __name__ == "__main__":
-    criar_dados_teste()
+    # Totais dos pedidos recalculados uma vez ao final, não a cada item
+    with adiar_totais():
+        criar_dados_teste()
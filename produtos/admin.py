@@ -1,5 +1,29 @@
-from django.contrib import admin
-from .models import Produto
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from rest_framework.exceptions import ValidationError
+from .atualizacao import atualizar_produtos
+from .models import HistoricoPreco, Produto
+
+
+class ProdutoActionForm(ActionForm):
+    """Campo extra ao lado das ações: o preço ou o percentual das ações de preço"""
+    valor = forms.DecimalField(
+        required=False, max_digits=10, decimal_places=2,
+        label='Valor', help_text='Preço ou percentual (negativo para desconto)'
+    )
+
+
+class HistoricoPrecoInline(admin.TabularInline):
+    """Somente leitura: o histórico é gravado a cada mudança de preço"""
+    model = HistoricoPreco
+    extra = 0
+    fields = ['preco', 'valido_de', 'valido_ate']
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Produto)
@@ -9,6 +33,7 @@ class ProdutoAdmin(admin.ModelAdmin):
     search_fields = ['nome']
     ordering = ['nome']
     readonly_fields = ['id', 'created_at', 'updated_at']
+    inlines = [HistoricoPrecoInline]
     
     fieldsets = (
         ('Informações Básicas', {
@@ -19,3 +44,58 @@ class ProdutoAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         })
     )
+    
+    action_form = ProdutoActionForm
+    actions = ['definir_preco', 'reajustar_preco', 'ativar_produtos', 'desativar_produtos']
+    
+    def _atualizar(self, request, alteracoes, percentual=None):
+        """Aplica o lote pelo mesmo serviço da API e informa o resultado"""
+        try:
+            resultado = atualizar_produtos(alteracoes, percentual)
+        except ValidationError as exc:
+            erros = exc.detail
+            motivos = []
+            if 'nao_encontrados' in erros:
+                motivos.append(f"produtos não encontrados: {', '.join(erros['nao_encontrados'])}")
+            for pk, mensagens in erros.get('precos_invalidos', {}).items():
+                motivos.append(f"produto {pk}: {' '.join(mensagens)}")
+            self.message_user(request, f"Nenhum produto alterado; {'; '.join(motivos)}", messages.ERROR)
+            return
+        self.message_user(
+            request,
+            f"{resultado['precos_alterados']} preços alterados, {resultado['ativados']} produtos "
+            f"ativados e {resultado['desativados']} desativados."
+        )
+    
+    def _valor(self, request):
+        try:
+            valor = self.action_form.base_fields['valor'].clean(request.POST.get('valor'))
+        except forms.ValidationError:
+            valor = None
+        if valor is None:
+            self.message_user(request, 'Informe um valor válido no campo "Valor".', messages.ERROR)
+        return valor
+    
+    def definir_preco(self, request, queryset):
+        """Action para aplicar o mesmo preço aos produtos selecionados"""
+        preco = self._valor(request)
+        if preco is not None:
+            self._atualizar(request, {pk: {'preco': preco} for pk in queryset.values_list('pk', flat=True)})
+    definir_preco.short_description = "Definir preço (Valor) dos selecionados"
+    
+    def reajustar_preco(self, request, queryset):
+        """Action para reajustar o preço dos produtos selecionados em um percentual"""
+        percentual = self._valor(request)
+        if percentual is not None:
+            self._atualizar(request, dict.fromkeys(queryset.values_list('pk', flat=True), {}), percentual)
+    reajustar_preco.short_description = "Reajustar preço dos selecionados em Valor %%"
+    
+    def ativar_produtos(self, request, queryset):
+        """Action para ativar os produtos selecionados"""
+        self._atualizar(request, dict.fromkeys(queryset.values_list('pk', flat=True), {'ativo': True}))
+    ativar_produtos.short_description = "Ativar produtos selecionados"
+    
+    def desativar_produtos(self, request, queryset):
+        """Action para desativar os produtos selecionados"""
+        self._atualizar(request, dict.fromkeys(queryset.values_list('pk', flat=True), {'ativo': False}))
+    desativar_produtos.short_description = "Desativar produtos selecionados"
@@ -5,3 +5,7 @@ class ProdutosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'produtos'
     verbose_name = 'Produtos'
+
+    def ready(self):
+        # Invalida o catálogo em memória a cada gravação de produto
+        import produtos.signals  # noqa: F401
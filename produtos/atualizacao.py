@@ -0,0 +1,129 @@
+"""
+Atualização de preços e ativação de produtos em lote
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from core.importacao import ler_registros
+from .catalogo import invalidar_catalogo
+from .models import Produto
+from .precos import registrar_precos
+from .serializers import AtualizacaoProdutoSerializer
+
+
+CENTAVO = Decimal('0.01')
+
+
+def reajustar(preco, percentual):
+    """Preço acrescido de `percentual` por cento (negativo para desconto), em centavos"""
+    return (preco * (1 + Decimal(percentual) / 100)).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def ler_alteracoes_csv(arquivo):
+    """
+    Lê um CSV com as colunas id, preco e ativo (as duas últimas opcionais).
+
+    Retorna o dicionário id -> alterações; com qualquer linha inválida lança
+    ValidationError com os erros de todas elas, já que o lote é aplicado inteiro.
+    """
+    validador = AtualizacaoProdutoSerializer()
+    alteracoes, erros = {}, []
+    for linha, dados, erro in ler_registros(arquivo, 'csv'):
+        if erro:
+            erros.append({'linha': linha, 'erros': erro})
+            continue
+        dados = {campo: valor for campo, valor in dados.items() if valor not in ('', None)}
+        try:
+            validos = validador.run_validation(dados)
+        except ValidationError as exc:
+            erros.append({'linha': linha, 'erros': as_serializer_error(exc)})
+            continue
+        alteracoes[validos.pop('id')] = validos
+    if erros:
+        raise ValidationError({'linhas': erros})
+    return alteracoes
+
+
+def atualizar_produtos(alteracoes, percentual=None, using='default'):
+    """
+    Aplica preços e ativação a muitos produtos em uma única transação.
+
+    `alteracoes` mapeia id -> {'preco': ..., 'ativo': ...}, ambas as chaves
+    opcionais; com `percentual`, o novo preço de cada produto é o atual
+    reajustado. Todos os preços passam pelos validadores do campo antes de
+    qualquer gravação: um id inexistente ou um preço inválido cancela o lote
+    (ValidationError com todos os problemas).
+
+    Tudo é gravado em lote: um bulk_update com os preços reajustados já
+    validados, um UPDATE por preço absoluto distinto e um por valor de
+    `ativo`. O histórico de preços e a invalidação do catálogo acontecem
+    uma vez só, no fim.
+    """
+    campo_preco = Produto._meta.get_field('preco')
+    momento = timezone.now()
+    with transaction.atomic(using=using):
+        produtos = (
+            Produto.objects.using(using).select_for_update()
+            .only('id', 'preco', 'ativo').in_bulk(list(alteracoes))
+        )
+        erros = {}
+        faltando = sorted(set(alteracoes) - produtos.keys())
+        if faltando:
+            erros['nao_encontrados'] = faltando
+
+        precos_invalidos = {}
+        reajustados, por_preco, ativacao = [], {}, {True: [], False: []}
+        for pk, produto in produtos.items():
+            dados = alteracoes[pk]
+            preco = dados.get('preco')
+            if percentual is not None:
+                preco = reajustar(produto.preco, percentual)
+            if preco is not None:
+                try:
+                    preco = campo_preco.clean(preco, produto)
+                except DjangoValidationError as exc:
+                    precos_invalidos[str(pk)] = exc.messages
+                    continue
+                if preco != produto.preco:
+                    if percentual is not None:
+                        produto.preco = preco
+                        produto.updated_at = momento
+                        reajustados.append(produto)
+                    else:
+                        por_preco.setdefault(preco, []).append(pk)
+            ativo = dados.get('ativo')
+            if ativo is not None and ativo != produto.ativo:
+                ativacao[ativo].append(pk)
+        if precos_invalidos:
+            erros['precos_invalidos'] = precos_invalidos
+        if erros:
+            raise ValidationError(erros)
+
+        manager = Produto.objects.using(using)
+        novos_precos = {}
+        if reajustados:
+            # Grava os mesmos Decimals que passaram pela validação (arredondamento do Python)
+            manager.bulk_update(reajustados, ['preco', 'updated_at'])
+            novos_precos.update((produto.pk, produto.preco) for produto in reajustados)
+        for preco, ids in por_preco.items():
+            manager.filter(pk__in=ids).update(preco=preco, updated_at=momento)
+            novos_precos.update(dict.fromkeys(ids, preco))
+        for ativo, ids in ativacao.items():
+            if ids:
+                manager.filter(pk__in=ids).update(ativo=ativo, updated_at=momento)
+
+        registrar_precos(novos_precos, momento, using=using)
+        if novos_precos or ativacao[True] or ativacao[False]:
+            invalidar_catalogo(using=using)
+
+    return {
+        'produtos': len(produtos),
+        'precos_alterados': len(novos_precos),
+        'ativados': len(ativacao[True]),
+        'desativados': len(ativacao[False]),
+    }
@@ -0,0 +1,98 @@
+"""
+Catálogo de produtos em memória, invalidado por versão no cache do Django
+
+Cada processo guarda id -> ProdutoCatalogo(id, nome, preco, ativo). A versão
+do catálogo fica no cache compartilhado e muda a cada gravação de Produto;
+ao perceber uma versão diferente da que carregou, o processo relê a tabela
+com uma consulta. Com mais de um processo, o cache precisa ser compartilhado
+(CACHE_REDIS_URL); CATALOGO_PRODUTOS_TTL limita a idade do catálogo de
+qualquer forma.
+"""
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Produto
+
+
+ProdutoCatalogo = namedtuple('ProdutoCatalogo', ['id', 'nome', 'preco', 'ativo'])
+
+CHAVE_VERSAO = 'produtos:catalogo:versao'
+
+
+def versao_atual():
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        cache.add(CHAVE_VERSAO, uuid.uuid4().hex, timeout=None)
+        versao = cache.get(CHAVE_VERSAO)
+    return versao
+
+
+def invalidar_catalogo(using=None):
+    """Troca a versão do catálogo quando a transação atual for confirmada"""
+    transaction.on_commit(
+        lambda: cache.set(CHAVE_VERSAO, uuid.uuid4().hex, timeout=None), using=using
+    )
+
+
+class CatalogoProdutos:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versao = None
+        self._carregado_em = 0.0
+        self._produtos = {}
+
+    def produtos(self):
+        """Dicionário id -> ProdutoCatalogo, recarregado se a versão mudou"""
+        versao = versao_atual()
+        if not self._expirado(versao):
+            return self._produtos
+        if transaction.get_connection().in_atomic_block:
+            # Dentro de uma transação a leitura pode ver gravações que ainda
+            # serão desfeitas; usa a leitura só nesta chamada, sem guardá-la
+            return self._ler()
+        with self._lock:
+            if self._expirado(versao):
+                self._produtos = self._ler()
+                self._versao = versao
+                self._carregado_em = time.monotonic()
+        return self._produtos
+
+    def _expirado(self, versao):
+        ttl = getattr(settings, 'CATALOGO_PRODUTOS_TTL', 300)
+        return versao != self._versao or time.monotonic() - self._carregado_em > ttl
+
+    def _ler(self):
+        return {
+            produto.id: produto
+            for produto in map(
+                ProdutoCatalogo._make,
+                Produto.objects.order_by('nome', 'id').values_list('id', 'nome', 'preco', 'ativo'),
+            )
+        }
+
+    def ativos(self):
+        """Produtos ativos em ordem de nome"""
+        return [produto for produto in self.produtos().values() if produto.ativo]
+
+    def instancias(self, ids):
+        """
+        Instâncias de Produto (id, nome, preco e ativo carregados) para os ids do catálogo.
+
+        Ids fora do catálogo simplesmente não aparecem no resultado.
+        """
+        produtos = self.produtos()
+        campos = ProdutoCatalogo._fields
+        return {
+            pk: Produto.from_db('default', campos, produtos[pk])
+            for pk in ids if pk in produtos
+        }
+
+
+catalogo = CatalogoProdutos()
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:01
+
+from django.db import migrations, models
+
+from core.busca import normalizar_busca
+
+
+def preencher_nome_busca(apps, schema_editor):
+    """Preenche nome_busca dos registros existentes, em lotes"""
+    Produto = apps.get_model('produtos', 'Produto')
+    db_alias = schema_editor.connection.alias
+    lote = []
+    for registro in Produto.objects.using(db_alias).only('id', 'nome').iterator(chunk_size=2000):
+        registro.nome_busca = normalizar_busca(registro.nome)[:255]
+        lote.append(registro)
+        if len(lote) == 2000:
+            Produto.objects.using(db_alias).bulk_update(lote, ['nome_busca'])
+            lote = []
+    if lote:
+        Produto.objects.using(db_alias).bulk_update(lote, ['nome_busca'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='nome_busca',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(preencher_nome_busca, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['nome_busca'], name='produtos_nome_busca_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
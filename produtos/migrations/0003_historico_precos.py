@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def registrar_precos_atuais(apps, schema_editor):
+    """
+    Abre o primeiro intervalo de cada produto com o preço atual, a partir do
+    cadastro (os preços anteriores não foram guardados)
+    """
+    Produto = apps.get_model('produtos', 'Produto')
+    HistoricoPreco = apps.get_model('produtos', 'HistoricoPreco')
+    db_alias = schema_editor.connection.alias
+    lote = []
+    for produto_id, preco, created_at in (
+        Produto.objects.using(db_alias).values_list('id', 'preco', 'created_at').iterator(chunk_size=2000)
+    ):
+        lote.append(HistoricoPreco(produto_id=produto_id, preco=preco, valido_de=created_at))
+        if len(lote) == 2000:
+            HistoricoPreco.objects.using(db_alias).bulk_create(lote)
+            lote = []
+    if lote:
+        HistoricoPreco.objects.using(db_alias).bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0002_nome_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricoPreco',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('preco', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('valido_de', models.DateTimeField()),
+                ('valido_ate', models.DateTimeField(blank=True, null=True)),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historico_precos', to='produtos.produto')),
+            ],
+            options={
+                'verbose_name': 'Histórico de Preço',
+                'verbose_name_plural': 'Histórico de Preços',
+                'db_table': 'produtos_historico_precos',
+                'ordering': ['produto', '-valido_de'],
+                'indexes': [models.Index(fields=['produto', 'valido_de'], name='hist_precos_produto_idx')],
+            },
+        ),
+        migrations.RunPython(registrar_precos_atuais, migrations.RunPython.noop),
+    ]
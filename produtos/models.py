@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
+from core.busca import normalizar_busca
 
 class Produto(models.Model):
     id = models.AutoField(primary_key=True)
     nome = models.CharField(max_length=255)
+    # Nome sem acentos e em minúsculas, para busca por prefixo (core.busca)
+    nome_busca = models.CharField(max_length=255, default='', editable=False)
     preco = models.DecimalField(
         max_digits=10, 
         decimal_places=2,
@@ -18,6 +21,49 @@ class Produto(models.Model):
         verbose_name = 'Produto'
         verbose_name_plural = 'Produtos'
         ordering = ['nome']
+        indexes = [
+            models.Index(
+                fields=['nome_busca'], name='produtos_nome_busca_idx',
+                opclasses=['varchar_pattern_ops']
+            ),
+        ]
     
     def __str__(self):
         return self.nome
+    
+    def save(self, *args, **kwargs):
+        self.nome_busca = normalizar_busca(self.nome)[:255]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'nome' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'nome_busca'}
+        # O histórico de preços é gravado no post_save, na mesma transação
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class HistoricoPreco(models.Model):
+    """
+    Preço de um produto em um intervalo [valido_de, valido_ate).
+
+    Só recebe inserções: uma mudança de preço fecha o intervalo vigente
+    (valido_ate nulo) e abre outro a partir do mesmo instante.
+    """
+    id = models.AutoField(primary_key=True)
+    produto = models.ForeignKey(
+        Produto, on_delete=models.CASCADE, related_name='historico_precos'
+    )
+    preco = models.DecimalField(max_digits=10, decimal_places=2)
+    valido_de = models.DateTimeField()
+    valido_ate = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'produtos_historico_precos'
+        verbose_name = 'Histórico de Preço'
+        verbose_name_plural = 'Histórico de Preços'
+        ordering = ['produto', '-valido_de']
+        indexes = [
+            models.Index(fields=['produto', 'valido_de'], name='hist_precos_produto_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.produto_id}: {self.preco} desde {self.valido_de}'
@@ -0,0 +1,90 @@
+"""
+Histórico de preços dos produtos e consulta do preço vigente em uma data
+"""
+from datetime import datetime, time
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import HistoricoPreco
+
+
+def ler_momento(valor):
+    """
+    Converte a data da query string em datetime com fuso.
+
+    Aceita data e hora ISO 8601 ou só a data (YYYY-MM-DD), que vale o fim do
+    dia no fuso TIME_ZONE; sem valor, usa o instante atual. Lança ValueError
+    com a mensagem para o cliente quando o formato é inválido.
+    """
+    if not valor:
+        return timezone.now()
+    try:
+        dia = parse_date(valor)
+        momento = datetime.combine(dia, time.max) if dia else parse_datetime(valor)
+        if momento is None:
+            raise ValueError
+    except ValueError:
+        raise ValueError('Formato de data inválido. Use YYYY-MM-DD ou data e hora ISO 8601')
+    if timezone.is_naive(momento):
+        momento = timezone.make_aware(momento)
+    return momento
+
+
+def vigentes_em(momento, using='default'):
+    """Um registro por produto: o intervalo que contém `momento`"""
+    return (
+        HistoricoPreco.objects.using(using)
+        .filter(valido_de__lte=momento)
+        .filter(Q(valido_ate__isnull=True) | Q(valido_ate__gt=momento))
+        .order_by()
+    )
+
+
+def preco_em(produto_id, momento, using='default'):
+    """Registro do histórico vigente para o produto em `momento`, ou None"""
+    return vigentes_em(momento, using).filter(produto_id=produto_id).first()
+
+
+def precos_em(produto_ids, momento, using='default'):
+    """
+    Dicionário produto_id -> preço vigente em `momento`, em uma consulta.
+
+    Sem `produto_ids`, devolve todos os produtos. Produtos cadastrados depois
+    de `momento` ficam de fora.
+    """
+    registros = vigentes_em(momento, using)
+    if produto_ids is not None:
+        registros = registros.filter(produto_id__in=set(produto_ids))
+    return dict(registros.values_list('produto_id', 'preco'))
+
+
+def registrar_precos(precos, momento=None, using='default'):
+    """
+    Registra os preços informados (produto_id -> preço) a partir de `momento`.
+
+    Produtos cujo intervalo vigente já tem o mesmo preço são ignorados; para
+    os demais, o intervalo vigente é fechado e um novo é aberto. São três
+    consultas para qualquer quantidade de produtos.
+    """
+    if not precos:
+        return []
+    momento = momento or timezone.now()
+    with transaction.atomic(using=using):
+        abertos = HistoricoPreco.objects.using(using).filter(
+            produto_id__in=list(precos), valido_ate__isnull=True
+        )
+        atuais = dict(abertos.values_list('produto_id', 'preco'))
+        alterados = {
+            produto_id: preco for produto_id, preco in precos.items()
+            if atuais.get(produto_id) != preco
+        }
+        if not alterados:
+            return []
+        abertos.filter(produto_id__in=list(alterados)).update(valido_ate=momento)
+        return HistoricoPreco.objects.using(using).bulk_create([
+            HistoricoPreco(produto_id=produto_id, preco=preco, valido_de=momento)
+            for produto_id, preco in alterados.items()
+        ])
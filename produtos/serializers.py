@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Produto
+from .models import HistoricoPreco, Produto
 
 
 class ProdutoSerializer(serializers.ModelSerializer):
@@ -20,3 +20,52 @@ class ProdutoSelectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Produto
         fields = ['id', 'nome', 'preco']
+
+
+class HistoricoPrecoSerializer(serializers.ModelSerializer):
+    """Intervalo de validade de um preço"""
+    class Meta:
+        model = HistoricoPreco
+        fields = ['produto', 'preco', 'valido_de', 'valido_ate']
+
+
+class AtualizacaoProdutoSerializer(serializers.Serializer):
+    """Uma linha da atualização em lote: novo preço e/ou ativação (os limites do preço são validados no lote)"""
+    id = serializers.IntegerField(min_value=1)
+    preco = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    ativo = serializers.BooleanField(required=False)
+
+
+class AtualizacaoLoteProdutosSerializer(serializers.Serializer):
+    """
+    Atualização em lote: `itens` com valores por produto, ou `ids` com um
+    `percentual` de reajuste e/ou o mesmo `ativo` para todos
+    """
+    itens = AtualizacaoProdutoSerializer(many=True, required=False)
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    percentual = serializers.DecimalField(
+        max_digits=6, decimal_places=2, min_value=-100, required=False
+    )
+    ativo = serializers.BooleanField(required=False)
+
+    def validate(self, attrs):
+        if ('itens' in attrs) == ('ids' in attrs):
+            raise serializers.ValidationError("Informe 'itens' ou 'ids'.")
+        if 'itens' in attrs and ('percentual' in attrs or 'ativo' in attrs):
+            raise serializers.ValidationError(
+                "'percentual' e 'ativo' só valem junto com 'ids'; em 'itens' informe por produto."
+            )
+        if 'ids' in attrs and 'percentual' not in attrs and 'ativo' not in attrs:
+            raise serializers.ValidationError("Com 'ids', informe 'percentual' e/ou 'ativo'.")
+        if not attrs.get('itens', attrs.get('ids')):
+            raise serializers.ValidationError('Nenhum produto informado.')
+        return attrs
+
+    def alteracoes(self):
+        """(id -> alterações, percentual) para atualizar_produtos()"""
+        dados = self.validated_data
+        if 'itens' in dados:
+            itens = [dict(item) for item in dados['itens']]
+            return {item.pop('id'): item for item in itens}, None
+        comuns = {'ativo': dados['ativo']} if 'ativo' in dados else {}
+        return {pk: comuns for pk in dados['ids']}, dados.get('percentual')
@@ -0,0 +1,33 @@
+"""
+Consultas de produtos compartilhadas entre os fluxos de pedido
+"""
+from .catalogo import catalogo
+from .models import Produto
+
+
+def resolver_produtos(ids, somente_ativos=True, inativos_permitidos=()):
+    """
+    Busca os produtos informados no catálogo em memória; os que faltarem
+    nele são lidos do banco com uma única consulta.
+
+    Retorna (produtos, erros): um dicionário id -> Produto e a lista de
+    mensagens para ids inexistentes ou de produtos inativos. Produtos em
+    `inativos_permitidos` (ex.: já presentes no pedido) são aceitos mesmo inativos.
+    """
+    ids = set(ids)
+    produtos = catalogo.instancias(ids)
+    if len(produtos) < len(ids):
+        produtos.update(Produto.objects.in_bulk(ids - produtos.keys()))
+
+    erros = []
+    faltando = sorted(ids - produtos.keys())
+    if faltando:
+        erros.append(f"Produtos não encontrados: {', '.join(map(str, faltando))}.")
+    if somente_ativos:
+        inativos = sorted(
+            pk for pk, produto in produtos.items()
+            if not produto.ativo and pk not in inativos_permitidos
+        )
+        if inativos:
+            erros.append(f"Produtos inativos: {', '.join(map(str, inativos))}.")
+    return produtos, erros
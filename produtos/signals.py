@@ -0,0 +1,31 @@
+"""
+Invalidação do catálogo de produtos em memória e registro do histórico de preços
+"""
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .catalogo import invalidar_catalogo
+from .models import Produto
+from .precos import registrar_precos
+
+
+@receiver(post_save, sender=Produto)
+@receiver(post_delete, sender=Produto)
+def produto_alterado(sender, using=None, **kwargs):
+    invalidar_catalogo(using=using)
+
+
+@receiver(post_init, sender=Produto)
+def guardar_preco_original(sender, instance, **kwargs):
+    # None quando o preço não foi carregado (only/defer) ou o produto é novo
+    instance._preco_original = instance.__dict__.get('preco') if instance.pk else None
+
+
+@receiver(post_save, sender=Produto)
+def registrar_mudanca_preco(sender, instance, created, using=None, update_fields=None, **kwargs):
+    if update_fields is not None and 'preco' not in update_fields:
+        return
+    preco = sender._meta.get_field('preco').to_python(instance.preco)
+    if created or instance._preco_original != preco:
+        registrar_precos({instance.pk: preco}, using=using)
+    instance._preco_original = preco
@@ -1,30 +1,137 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.conf import settings
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from core.condicional import gerar_etag, get_condicional
+from core.mixins import AutocompletarMixin
+from .atualizacao import atualizar_produtos, ler_alteracoes_csv
+from .catalogo import catalogo, versao_atual
 from .models import Produto
-from .serializers import ProdutoSerializer, ProdutoSelectSerializer
+from .precos import ler_momento, preco_em, precos_em
+from .serializers import (
+    AtualizacaoLoteProdutosSerializer, HistoricoPrecoSerializer,
+    ProdutoSerializer, ProdutoSelectSerializer
+)
+
+
+def etag_catalogo(request, *args, **kwargs):
+    """Toda gravação de produto troca a versão do catálogo"""
+    return gerar_etag(request, versao_atual())
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class ProdutoViewSet(viewsets.ReadOnlyModelViewSet):
+class ProdutoViewSet(AutocompletarMixin, viewsets.ReadOnlyModelViewSet):
     """
-    ViewSet apenas para leitura de produtos (gerenciamento feito no admin)
+    ViewSet de leitura de produtos (cadastro feito no admin); preços e
+    ativação também podem ser alterados em lote pela equipe
     """
     queryset = Produto.objects.filter(ativo=True)
     serializer_class = ProdutoSerializer
     permission_classes = [IsAuthenticated]
+    autocompletar_serializer_class = ProdutoSelectSerializer
     
     def get_serializer_class(self):
-        if self.action == 'select':
+        if self.action in ('select', 'autocompletar'):
             return ProdutoSelectSerializer
         return ProdutoSerializer
     
+    @get_condicional(etag_catalogo)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    @get_condicional(etag_catalogo)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
     @action(detail=False, methods=['get'])
+    @get_condicional(etag_catalogo)
     def select(self, request):
-        """Endpoint para select de produtos"""
-        produtos = self.get_queryset()
+        """Endpoint para select de produtos (com ?q=, apenas os primeiros que começam com o termo)"""
+        if 'q' in request.query_params:
+            return self.autocompletar(request)
+        # Lido do catálogo em memória, sem ir ao banco
+        produtos = catalogo.ativos()
         serializer = ProdutoSelectSerializer(produtos, many=True)
         return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def preco_em(self, request, pk=None):
+        """Preço vigente do produto na data (?data=, padrão agora), inclusive de produtos inativos"""
+        try:
+            momento = ler_momento(request.query_params.get('data'))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        registro = preco_em(pk, momento)
+        if registro is None:
+            return Response(
+                {'error': 'Produto sem preço registrado nesta data'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(HistoricoPrecoSerializer(registro).data)
+    
+    @action(detail=False, methods=['get', 'post'])
+    def precos_em(self, request):
+        """
+        Preços vigentes na data para vários produtos, em uma consulta.
+        
+        `produtos` (lista ou ids separados por vírgula) e `data` vêm da query
+        string no GET ou do corpo no POST, para listas longas.
+        """
+        params = request.data if request.method == 'POST' else request.query_params
+        produtos = params.get('produtos') or []
+        if isinstance(produtos, str):
+            produtos = [valor for valor in produtos.split(',') if valor.strip()]
+        try:
+            produto_ids = {int(valor) for valor in produtos}
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'Informe os ids dos produtos como números'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            momento = ler_momento(params.get('data'))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        maximo = getattr(settings, 'PRECOS_EM_MAX_PRODUTOS', 10000)
+        if not produto_ids or len(produto_ids) > maximo:
+            return Response(
+                {'error': f'Informe de 1 a {maximo} produtos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        precos = precos_em(produto_ids, momento)
+        return Response({
+            'data': timezone.localtime(momento),
+            'precos': {str(produto_id): str(preco) for produto_id, preco in precos.items()},
+            'sem_preco': sorted(produto_ids - precos.keys()),
+        })
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def atualizar_em_lote(self, request):
+        """
+        Atualiza preços e ativação de vários produtos em uma transação (só equipe).
+        
+        Aceita JSON com `itens` [{id, preco, ativo}] ou `ids` com `percentual`
+        e/ou `ativo`, ou um CSV (id, preco, ativo) no campo "arquivo".
+        Com qualquer erro nada é gravado.
+        """
+        arquivo = request.FILES.get('arquivo')
+        if arquivo:
+            alteracoes, percentual = ler_alteracoes_csv(arquivo), None
+        else:
+            serializer = AtualizacaoLoteProdutosSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            alteracoes, percentual = serializer.alteracoes()
+        
+        if not alteracoes:
+            return Response(
+                {'error': 'Nenhum produto informado'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(atualizar_produtos(alteracoes, percentual))
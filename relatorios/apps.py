@@ -5,3 +5,7 @@ class RelatoriosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'relatorios'
     verbose_name = 'Relatórios'
+
+    def ready(self):
+        # Conecta a invalidação de caches às alterações de pedidos
+        import relatorios.signals  # noqa: F401
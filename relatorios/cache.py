@@ -0,0 +1,104 @@
+"""
+Cache de resultados dos relatórios, por endpoint e parâmetros normalizados
+
+Cada entrada guarda os dados da resposta e o instante em que foram
+calculados. A chave inclui a versão das etiquetas de que o relatório
+depende (pedidos, clientes, produtos); uma gravação troca a versão da
+etiqueta depois do commit e as entradas antigas deixam de ser lidas,
+expirando sozinhas pelo timeout. As versões são lidas antes do cálculo,
+então um resultado calculado durante uma gravação fica sob a versão antiga.
+
+As respostas trazem X-Cache (HIT ou MISS) e Age (segundos desde o cálculo);
+`Cache-Control: no-cache` na requisição força o recálculo.
+"""
+import hashlib
+import json
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from produtos.catalogo import CHAVE_VERSAO
+
+
+ETIQUETAS = {
+    'pedidos': 'relatorios:etiqueta:pedidos',
+    'clientes': 'relatorios:etiqueta:clientes',
+    # A versão do catálogo já muda a cada gravação de produto, inclusive em lote
+    'produtos': CHAVE_VERSAO,
+}
+
+
+def versoes(etiquetas):
+    """Versão atual de cada etiqueta, em uma leitura do cache"""
+    chaves = [ETIQUETAS[etiqueta] for etiqueta in etiquetas]
+    atuais = cache.get_many(chaves)
+    for chave in chaves:
+        if chave not in atuais:
+            cache.add(chave, uuid.uuid4().hex, timeout=None)
+            atuais[chave] = cache.get(chave)
+    return [atuais[chave] for chave in chaves]
+
+
+def invalidar_etiquetas(*etiquetas, using=None):
+    """Troca a versão das etiquetas quando a transação atual for confirmada"""
+    transaction.on_commit(
+        lambda: cache.set_many(
+            {ETIQUETAS[etiqueta]: uuid.uuid4().hex for etiqueta in etiquetas}, timeout=None
+        ),
+        using=using,
+    )
+
+
+def normalizar_parametros(query_params):
+    """Parâmetros em ordem, sem valores vazios, para que a ordem na URL não mude a chave"""
+    return sorted(
+        (nome, sorted(valor for valor in valores if valor != ''))
+        for nome, valores in query_params.lists()
+        if any(valor != '' for valor in valores)
+    )
+
+
+def chave_resultado(nome, query_params, versoes_etiquetas):
+    conteudo = json.dumps([nome, normalizar_parametros(query_params), versoes_etiquetas])
+    return f'relatorios:resultado:{hashlib.md5(conteudo.encode()).hexdigest()}'
+
+
+def relatorio_em_cache(*etiquetas, timeout=None):
+    """
+    Guarda em cache as respostas 200 de uma view de relatório (função com
+    @api_view ou ação de ViewSet), por endpoint e parâmetros da query string.
+
+    `etiquetas` são as tabelas de que o relatório depende; o timeout padrão
+    vem de RELATORIOS_CACHE_TIMEOUT.
+    """
+    def decorador(view):
+        nome = f'{view.__module__}.{view.__qualname__}'
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            request = next(arg for arg in args if isinstance(arg, Request))
+            chave = chave_resultado(nome, request.query_params, versoes(etiquetas))
+            if 'no-cache' not in request.headers.get('Cache-Control', ''):
+                entrada = cache.get(chave)
+                if entrada is not None:
+                    dados, calculado_em = entrada
+                    response = Response(dados)
+                    response['X-Cache'] = 'HIT'
+                    response['Age'] = max(0, int(time.time() - calculado_em))
+                    return response
+
+            response = view(*args, **kwargs)
+            if response.status_code == 200:
+                validade = timeout or getattr(settings, 'RELATORIOS_CACHE_TIMEOUT', 300)
+                cache.set(chave, (response.data, time.time()), validade)
+                response['X-Cache'] = 'MISS'
+                response['Age'] = 0
+            return response
+        return wrapper
+    return decorador
@@ -0,0 +1,473 @@
+"""
+Manutenção das tabelas consolidadas de vendas por dia (VendaDiaria) e por
+produto e dia (VendaProdutoDiaria)
+
+Cada gravação de pedido ou de itens aplica só a própria diferença às linhas
+do dia, nas duas tabelas e na mesma transação da gravação: o custo não
+depende de quantos pedidos o dia já tem. Os clientes distintos, que não são aditivos, são
+ajustados verificando se o cliente tem outro pedido no mesmo dia e status.
+
+Toda alteração de um dia trava antes a linha do dia em DiaConsolidado, o que
+serializa os ajustes e o recálculo completo (recalcular_periodo), usado na
+reconstrução das tabelas e quando a gravação não informa o estado anterior.
+"""
+from collections import Counter, defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from pedidos.models import Pedido, PedidoItem
+from .models import DiaConsolidado, VendaDiaria, VendaProdutoDiaria
+
+
+# Campos do pedido que entram em VendaDiaria
+EstadoPedido = namedtuple('EstadoPedido', 'dia status cliente_id total')
+CAMPOS_ESTADO = {'data_pedido', 'status', 'cliente', 'cliente_id', 'total'}
+
+
+def dia_local(momento):
+    """Dia de `momento` no fuso TIME_ZONE, o mesmo usado para consolidar"""
+    return timezone.localtime(momento, timezone.get_default_timezone()).date()
+
+
+def inicio_dia(dia):
+    return datetime.combine(dia, time.min, tzinfo=timezone.get_default_timezone())
+
+
+def faixas_contiguas(dias):
+    """Agrupa os dias em faixas (inicio, fim) de dias consecutivos"""
+    faixas = []
+    for dia in sorted(set(dias)):
+        if faixas and dia - faixas[-1][1] == timedelta(days=1):
+            faixas[-1][1] = dia
+        else:
+            faixas.append([dia, dia])
+    return [tuple(faixa) for faixa in faixas]
+
+
+def travar_dias(dias, using='default'):
+    """
+    Trava as linhas dos dias em DiaConsolidado até o fim da transação atual,
+    criando as que faltam; sempre na ordem dos dias, para não haver deadlock
+    """
+    dias = sorted(set(dias))
+    if not dias:
+        return
+    travados = DiaConsolidado.objects.using(using).select_for_update().filter(dia__in=dias)
+    if len(list(travados.order_by('dia'))) < len(dias):
+        DiaConsolidado.objects.using(using).bulk_create(
+            [DiaConsolidado(dia=dia) for dia in dias], ignore_conflicts=True
+        )
+        list(travados.order_by('dia'))
+
+
+def _faixa_pedidos(data_inicio, data_fim, prefixo=''):
+    return {
+        f'{prefixo}data_pedido__gte': inicio_dia(data_inicio),
+        f'{prefixo}data_pedido__lt': inicio_dia(data_fim + timedelta(days=1)),
+    }
+
+
+# Ajustes incrementais
+
+def estado_pedido(pedido):
+    """Estado do pedido em memória, como entra em VendaDiaria"""
+    return EstadoPedido(
+        dia_local(pedido.data_pedido), pedido.status, pedido.cliente_id, Decimal(str(pedido.total))
+    )
+
+
+class Diferencas:
+    """Diferenças a somar nas linhas consolidadas, acumuladas por chave"""
+
+    def __init__(self):
+        self.vendas = defaultdict(Counter)
+        self.produtos = defaultdict(Counter)
+        # (dia, status, cliente_id, ids de pedidos a ignorar, +1/-1)
+        self.clientes = []
+        self.recontar_clientes = set()
+
+    def dias(self):
+        return {dia for dia, _ in self.vendas} | {dia for dia, _ in self.produtos}
+
+    def pedido(self, estado, sinal):
+        linha = self.vendas[(estado.dia, estado.status)]
+        linha['quantidade_pedidos'] += sinal
+        linha['valor_total'] += sinal * estado.total
+
+    def cliente(self, estado, pedido_ids, sinal):
+        self.clientes.append((estado.dia, estado.status, estado.cliente_id, pedido_ids, sinal))
+
+    def itens(self, dia, status, itens, sinal):
+        linha = self.vendas[(dia, status)]
+        for item in itens:
+            linha['quantidade_itens'] += sinal * item.quantidade
+        if status != Pedido.StatusChoices.FINALIZADO:
+            return
+        # Um item por produto no pedido (unique_together): cada item é um pedido do produto
+        for item in itens:
+            produto = self.produtos[(dia, item.produto_id)]
+            produto['quantidade'] += sinal * item.quantidade
+            produto['valor_total'] += sinal * item.valor_total
+            produto['quantidade_pedidos'] += sinal
+
+
+def _tem_outro_pedido(dia, status, cliente_id, ignorar, using):
+    return (
+        Pedido.objects.using(using)
+        .filter(cliente_id=cliente_id, status=status, **_faixa_pedidos(dia, dia))
+        .exclude(pk__in=ignorar)
+        .exists()
+    )
+
+
+def _contar_clientes(chaves, using):
+    """Clientes distintos de cada (dia, status) informado, em uma consulta"""
+    dias = {dia for dia, _ in chaves}
+    contagens = (
+        Pedido.objects.using(using)
+        .filter(status__in={status for _, status in chaves}, **_faixa_pedidos(min(dias), max(dias)))
+        .annotate(dia=TruncDate('data_pedido', tzinfo=timezone.get_default_timezone()))
+        .order_by()
+        .values_list('dia', 'status')
+        .annotate(clientes=Count('cliente', distinct=True))
+    )
+    return {
+        (dia, status): clientes for dia, status, clientes in contagens if (dia, status) in chaves
+    }
+
+
+def _somar(model, chave, diferencas, valores, using):
+    """
+    Soma as diferenças (e grava os `valores` absolutos) nas linhas de `model`,
+    criando as que faltam e removendo as que ficaram sem pedidos
+    """
+    chaves = set(diferencas) | set(valores)
+    if not chaves:
+        return
+    campo_a, campo_b = chave
+    atributo_b = model._meta.get_field(campo_b).attname
+    existentes = {
+        (getattr(linha, campo_a), getattr(linha, atributo_b)): linha
+        for linha in model.objects.using(using).filter(**{
+            f'{campo_a}__in': {a for a, _ in chaves},
+            f'{atributo_b}__in': {b for _, b in chaves},
+        })
+    }
+    novas, alteradas, vazias, campos = [], [], [], {'atualizado_em'}
+    agora = timezone.now()
+    for a, b in chaves:
+        linha = existentes.get((a, b)) or model(**{campo_a: a, atributo_b: b})
+        for campo, valor in diferencas.get((a, b), {}).items():
+            setattr(linha, campo, getattr(linha, campo) + valor)
+            campos.add(campo)
+        for campo, valor in valores.get((a, b), {}).items():
+            setattr(linha, campo, valor)
+            campos.add(campo)
+        linha.atualizado_em = agora
+        if linha.quantidade_pedidos <= 0:
+            if linha.pk:
+                vazias.append(linha.pk)
+        elif linha.pk:
+            alteradas.append(linha)
+        else:
+            novas.append(linha)
+    manager = model.objects.using(using)
+    if vazias:
+        manager.filter(pk__in=vazias).delete()
+    if alteradas:
+        manager.bulk_update(alteradas, sorted(campos))
+    if novas:
+        manager.bulk_create(novas)
+
+
+def aplicar(diferencas, using='default'):
+    """Grava as diferenças; os dias envolvidos já devem estar travados"""
+    for dia, status, cliente_id, ignorar, sinal in diferencas.clientes:
+        if not _tem_outro_pedido(dia, status, cliente_id, ignorar, using):
+            diferencas.vendas[(dia, status)]['clientes_distintos'] += sinal
+    valores = {}
+    if diferencas.recontar_clientes:
+        contagens = _contar_clientes(diferencas.recontar_clientes, using)
+        valores = {
+            chave: {'clientes_distintos': contagens.get(chave, 0)}
+            for chave in diferencas.recontar_clientes
+        }
+    _somar(VendaDiaria, ('dia', 'status'), diferencas.vendas, valores, using)
+    _somar(VendaProdutoDiaria, ('dia', 'produto'), diferencas.produtos, {}, using)
+
+
+def _itens_dos_pedidos(pedido_ids, using):
+    itens = defaultdict(list)
+    for item in (
+        PedidoItem.objects.using(using).filter(pedido_id__in=list(pedido_ids))
+        .only('pedido_id', 'produto_id', 'quantidade', 'valor_total')
+    ):
+        itens[item.pedido_id].append(item)
+    return itens
+
+
+def registrar_pedido(pedido_id, antes, depois, itens=None, using='default'):
+    """
+    Ajusta as tabelas consolidadas à mudança de um pedido de `antes` para
+    `depois` (EstadoPedido, None na criação ou na exclusão).
+
+    Os itens acompanham o pedido quando ele muda de dia ou status; na
+    exclusão, `itens` são os que o pedido tinha (já removidos do banco).
+    """
+    if antes == depois:
+        return
+    dias = {estado.dia for estado in (antes, depois) if estado}
+    with transaction.atomic(using=using):
+        travar_dias(dias, using)
+        diferencas = Diferencas()
+        for estado, sinal in ((antes, -1), (depois, 1)):
+            if estado:
+                diferencas.pedido(estado, sinal)
+        mudou_chave = not (antes and depois and antes[:2] == depois[:2])
+        if mudou_chave and antes and depois:
+            itens = _itens_dos_pedidos([pedido_id], using)[pedido_id]
+        if mudou_chave and itens:
+            for estado, sinal in ((antes, -1), (depois, 1)):
+                if estado:
+                    diferencas.itens(estado.dia, estado.status, itens, sinal)
+        if not (antes and depois and antes[:3] == depois[:3]):
+            for estado, sinal in ((antes, -1), (depois, 1)):
+                if estado:
+                    diferencas.cliente(estado, {pedido_id}, sinal)
+        aplicar(diferencas, using)
+
+
+def registrar_itens(antes, depois, using='default'):
+    """Ajusta as tabelas consolidadas aos itens removidos ou alterados (`antes`) e gravados (`depois`)"""
+    pedido_ids = {item.pedido_id for item in (*antes, *depois)}
+    if not pedido_ids:
+        return
+    with transaction.atomic(using=using):
+        # Trava os pedidos para que o status não mude entre a leitura e o ajuste
+        chaves = {
+            pk: (dia_local(data_pedido), status)
+            for pk, data_pedido, status in
+            Pedido.objects.using(using).select_for_update()
+            .filter(pk__in=pedido_ids).values_list('pk', 'data_pedido', 'status')
+        }
+        travar_dias({dia for dia, _ in chaves.values()}, using)
+        diferencas = Diferencas()
+        for itens, sinal in ((antes, -1), (depois, 1)):
+            for item in itens:
+                if item.pedido_id in chaves:
+                    diferencas.itens(*chaves[item.pedido_id], [item], sinal)
+        aplicar(diferencas, using)
+
+
+def registrar_pedidos_criados(pedido_ids, using='default'):
+    """Soma às tabelas consolidadas pedidos inseridos em lote, já com os itens"""
+    pedidos = list(
+        Pedido.objects.using(using).filter(pk__in=list(pedido_ids))
+        .values_list('pk', 'data_pedido', 'status', 'cliente_id', 'total')
+    )
+    if not pedidos:
+        return
+    itens = _itens_dos_pedidos([pedido[0] for pedido in pedidos], using)
+    estados = {pk: EstadoPedido(dia_local(data), *resto) for pk, data, *resto in pedidos}
+    with transaction.atomic(using=using):
+        travar_dias({estado.dia for estado in estados.values()}, using)
+        diferencas = Diferencas()
+        for pk, estado in estados.items():
+            diferencas.pedido(estado, 1)
+            diferencas.itens(estado.dia, estado.status, itens[pk], 1)
+        # Vários pedidos do mesmo cliente no lote: recontar sai mais barato que verificar um a um
+        diferencas.recontar_clientes = set(diferencas.vendas)
+        aplicar(diferencas, using)
+
+
+def registrar_totais(totais_anteriores, using='default'):
+    """Ajusta o valor vendido aos totais recalculados (pk -> total anterior)"""
+    diferencas = Diferencas()
+    pedidos = (
+        Pedido.objects.using(using).filter(pk__in=list(totais_anteriores))
+        .values_list('pk', 'data_pedido', 'status', 'total')
+    )
+    for pk, data_pedido, status, total in pedidos:
+        if total != totais_anteriores[pk]:
+            diferencas.vendas[(dia_local(data_pedido), status)]['valor_total'] += (
+                total - totais_anteriores[pk]
+            )
+    if diferencas.vendas:
+        with transaction.atomic(using=using):
+            travar_dias(diferencas.dias(), using)
+            aplicar(diferencas, using)
+
+
+# Recálculo completo
+
+def _gravar(model, linhas, chave, data_inicio, data_fim, using):
+    """
+    Upsert das linhas consolidadas de `model` em `chave` e remoção das que
+    ficaram sem movimento entre as duas datas
+    """
+    campos = [
+        campo.name for campo in model._meta.concrete_fields
+        if not campo.primary_key and campo.name not in chave
+    ]
+    atributos = [model._meta.get_field(campo).attname for campo in chave]
+    gravadas = {tuple(getattr(linha, atributo) for atributo in atributos) for linha in linhas}
+    if linhas:
+        model.objects.using(using).bulk_create(
+            linhas, update_conflicts=True, unique_fields=chave, update_fields=campos,
+        )
+    # Upsert não apaga: o que sobrou no período sem movimento sai aqui
+    obsoletas = [
+        pk for pk, *valores in
+        model.objects.using(using)
+        .filter(dia__gte=data_inicio, dia__lte=data_fim)
+        .values_list('pk', *atributos)
+        if tuple(valores) not in gravadas
+    ]
+    if obsoletas:
+        model.objects.using(using).filter(pk__in=obsoletas).delete()
+
+
+def consolidar_vendas(data_inicio, data_fim, using='default'):
+    """Linhas de VendaDiaria (ainda não gravadas) dos dias entre as duas datas"""
+    fuso = timezone.get_default_timezone()
+    pedidos = (
+        Pedido.objects.using(using)
+        .filter(**_faixa_pedidos(data_inicio, data_fim))
+        .annotate(dia=TruncDate('data_pedido', tzinfo=fuso))
+        .order_by()
+        .values('dia', 'status')
+        .annotate(
+            quantidade_pedidos=Count('id'),
+            valor_total=Sum('total'),
+            clientes_distintos=Count('cliente', distinct=True),
+        )
+    )
+    itens = dict(
+        ((linha['dia'], linha['pedido__status']), linha['quantidade'])
+        for linha in (
+            PedidoItem.objects.using(using)
+            .filter(**_faixa_pedidos(data_inicio, data_fim, 'pedido__'))
+            .annotate(dia=TruncDate('pedido__data_pedido', tzinfo=fuso))
+            .order_by()
+            .values('dia', 'pedido__status')
+            .annotate(quantidade=Sum('quantidade'))
+        )
+    )
+    return [
+        VendaDiaria(
+            dia=linha['dia'],
+            status=linha['status'],
+            quantidade_pedidos=linha['quantidade_pedidos'],
+            valor_total=linha['valor_total'] or 0,
+            quantidade_itens=itens.get((linha['dia'], linha['status']), 0),
+            clientes_distintos=linha['clientes_distintos'],
+        )
+        for linha in pedidos
+    ]
+
+
+def consolidar_produtos(data_inicio, data_fim, using='default'):
+    """Linhas de VendaProdutoDiaria (ainda não gravadas): itens de pedidos finalizados por dia e produto"""
+    itens = (
+        PedidoItem.objects.using(using)
+        .filter(
+            pedido__status=Pedido.StatusChoices.FINALIZADO,
+            **_faixa_pedidos(data_inicio, data_fim, 'pedido__'),
+        )
+        .annotate(dia=TruncDate('pedido__data_pedido', tzinfo=timezone.get_default_timezone()))
+        .order_by()
+        .values('dia', 'produto_id')
+        .annotate(
+            quantidade=Sum('quantidade'),
+            valor_total=Sum('valor_total'),
+            quantidade_pedidos=Count('pedido_id', distinct=True),
+        )
+    )
+    return [
+        VendaProdutoDiaria(
+            dia=linha['dia'],
+            produto_id=linha['produto_id'],
+            quantidade=linha['quantidade'],
+            valor_total=linha['valor_total'],
+            quantidade_pedidos=linha['quantidade_pedidos'],
+        )
+        for linha in itens
+    ]
+
+
+def recalcular_periodo(data_inicio, data_fim, using='default'):
+    """
+    Reconstrói as linhas de VendaDiaria e VendaProdutoDiaria dos dias entre
+    as duas datas, inclusive.
+
+    Os dias ficam travados durante a leitura e a gravação, então um recálculo
+    não sobrescreve ajustes nem outro recálculo mais recente. Três consultas
+    agregadas e um upsert por tabela; as combinações que ficaram sem pedidos
+    são removidas. Retorna o número de linhas gravadas.
+    """
+    with transaction.atomic(using=using):
+        travar_dias(
+            (data_inicio + timedelta(days=n) for n in range((data_fim - data_inicio).days + 1)),
+            using,
+        )
+        vendas = consolidar_vendas(data_inicio, data_fim, using)
+        produtos = consolidar_produtos(data_inicio, data_fim, using)
+        _gravar(VendaDiaria, vendas, ['dia', 'status'], data_inicio, data_fim, using)
+        _gravar(VendaProdutoDiaria, produtos, ['dia', 'produto'], data_inicio, data_fim, using)
+    return len(vendas) + len(produtos)
+
+
+def recalcular_dias(dias, using='default'):
+    """Recalcula os dias informados, uma faixa de dias consecutivos por vez"""
+    for data_inicio, data_fim in faixas_contiguas(dias):
+        recalcular_periodo(data_inicio, data_fim, using=using)
+
+
+def reconstruir(data_inicio=None, data_fim=None, dias=31, using='default'):
+    """
+    Recalcula o período em faixas de `dias` dias, uma transação por faixa.
+
+    Sem datas, cobre todo o histórico de pedidos e também os dias
+    consolidados cujos pedidos já foram excluídos. Retorna (data_inicio,
+    data_fim, linhas gravadas), com as datas None se não há o que consolidar.
+    """
+    limites = Pedido.objects.using(using).aggregate(primeiro=Min('data_pedido'), ultimo=Max('data_pedido'))
+    consolidados = VendaDiaria.objects.using(using).aggregate(primeiro=Min('dia'), ultimo=Max('dia'))
+    candidatos_inicio = [consolidados['primeiro']]
+    candidatos_fim = [consolidados['ultimo']]
+    if limites['primeiro']:
+        candidatos_inicio.append(dia_local(limites['primeiro']))
+        candidatos_fim.append(dia_local(limites['ultimo']))
+    data_inicio = data_inicio or min(filter(None, candidatos_inicio), default=None)
+    data_fim = data_fim or max(filter(None, candidatos_fim), default=None)
+    if data_inicio is None or data_fim is None:
+        return None, None, 0
+    if data_inicio > data_fim:
+        raise ValueError('data_inicio posterior a data_fim')
+
+    passo = timedelta(days=max(1, dias))
+    linhas = 0
+    inicio = data_inicio
+    # Faixas curtas mantêm cada transação (e seus locks) pequena
+    while inicio <= data_fim:
+        fim = min(inicio + passo - timedelta(days=1), data_fim)
+        linhas += recalcular_periodo(inicio, fim, using=using)
+        inicio = fim + timedelta(days=1)
+    return data_inicio, data_fim, linhas
+
+
+def dias_dos_pedidos(pedido_ids, using='default'):
+    """Dias (no fuso TIME_ZONE) dos pedidos informados, em uma consulta"""
+    return set(
+        Pedido.objects.using(using)
+        .filter(pk__in=list(pedido_ids))
+        .annotate(dia=TruncDate('data_pedido', tzinfo=timezone.get_default_timezone()))
+        .order_by()
+        .values_list('dia', flat=True)
+        .distinct()
+    )
@@ -0,0 +1,130 @@
+"""
+Relatórios como funções dos parâmetros (query string ou dicionário) para os dados
+
+Usados pelas views síncronas e pelas tarefas assíncronas (relatorios.tarefas);
+parâmetros inválidos lançam ValueError com a mensagem para o cliente.
+"""
+from django.db.models import Count
+
+from clientes.models import Cliente
+from pedidos.models import Pedido
+from produtos.catalogo import catalogo
+from .painel import adicionar_totais_vendas, novo_painel
+from .services import (
+    consolidado_diario, ler_limite, ler_periodo, ranking_clientes, ranking_produtos,
+    resumo_por_status, somar_dias
+)
+
+
+def relatorio_vendas_periodo(params):
+    """Vendas por período e status (lido da tabela consolidada por dia)"""
+    status_venda = params.get('status', Pedido.StatusChoices.FINALIZADO)
+    if status_venda not in Pedido.StatusChoices.values:
+        raise ValueError('Status inválido')
+    data_inicio, data_fim = ler_periodo(params)
+
+    dias = consolidado_diario(data_inicio, data_fim, status=status_venda)
+    totais = somar_dias(dias)
+    return {
+        'periodo': {
+            'inicio': data_inicio,
+            'fim': data_fim
+        },
+        'status': status_venda,
+        'total_vendas': totais['quantidade_pedidos'],
+        'valor_total': totais['valor_total'],
+        'valor_medio': totais['valor_medio'],
+        'quantidade_itens': totais['quantidade_itens'],
+        'vendas_por_dia': [
+            {
+                'data': dia['dia'],
+                'total_vendas': dia['quantidade_pedidos'],
+                'valor_total': dia['valor_total'],
+                'quantidade_itens': dia['quantidade_itens'],
+                'clientes_distintos': dia['clientes_distintos']
+            }
+            for dia in dias
+        ]
+    }
+
+
+def relatorio_produtos_mais_vendidos(params):
+    """Produtos mais vendidos (todo o histórico, ou o período de data_inicio/data_fim)"""
+    data_inicio = data_fim = None
+    if params.get('data_inicio') or params.get('data_fim'):
+        data_inicio, data_fim = ler_periodo(params)
+    ranking = ranking_produtos(
+        limite=ler_limite(params),
+        criterio=params.get('criterio', 'quantidade'),
+        data_inicio=data_inicio,
+        data_fim=data_fim
+    )
+
+    # Nomes do catálogo em memória, sem juntar com a tabela de produtos
+    produtos = catalogo.produtos()
+    for linha in ranking:
+        produto = produtos.get(linha['produto_id'])
+        linha['produto_nome'] = produto.nome if produto else None
+    return ranking
+
+
+def relatorio_clientes_top(params):
+    """Melhores clientes pelos pedidos finalizados"""
+    clientes = ranking_clientes(
+        limite=ler_limite(params),
+        criterio=params.get('criterio', 'valor'),
+        status=Pedido.StatusChoices.FINALIZADO
+    )
+    return [
+        {
+            'id': cliente.id,
+            'nome': cliente.nome,
+            'email': cliente.email,
+            'total_compras': cliente.valor_pedidos,
+            'numero_pedidos': cliente.qtd_pedidos
+        }
+        for cliente in clientes
+    ]
+
+
+def relatorio_geral(params, painel=None):
+    """Totais, pedidos por status e os 5 melhores clientes (até quatro consultas)"""
+    painel = painel or novo_painel('relatorios.geral', orcamento=4)
+    with painel.medir():
+        # Contadores básicos: vendas consolidadas e clientes, uma consulta cada
+        adicionar_totais_vendas(painel)
+        totais = painel.adicionar(Cliente, total_clientes=Count('id')).calcular()
+        total_produtos = len(catalogo.produtos())
+
+        # Pedidos por status (em cache)
+        pedidos_por_status = resumo_por_status()
+
+        # Top 5 clientes
+        clientes_dados = [
+            {
+                'nome': cliente.nome,
+                'total_pedidos': cliente.qtd_pedidos,
+                'valor_total': float(cliente.valor_pedidos)
+            }
+            for cliente in ranking_clientes(limite=5)
+        ]
+
+    return {
+        'totais': {
+            'clientes': totais['total_clientes'],
+            'produtos': total_produtos,
+            'pedidos': totais['total_pedidos'],
+            'faturamento': float(totais['faturamento_total'])
+        },
+        'pedidos_por_status': pedidos_por_status,
+        'top_clientes': clientes_dados
+    }
+
+
+# Relatórios que podem ser pedidos como tarefa assíncrona
+RELATORIOS = {
+    'vendas_periodo': relatorio_vendas_periodo,
+    'produtos_mais_vendidos': relatorio_produtos_mais_vendidos,
+    'clientes_top': relatorio_clientes_top,
+    'geral': relatorio_geral,
+}
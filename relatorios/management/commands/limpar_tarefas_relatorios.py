@@ -0,0 +1,23 @@
+"""
+Remoção das tarefas de relatório expiradas e das que nunca terminaram
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from relatorios.models import TarefaRelatorio
+from relatorios.tarefas import retencao
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove as tarefas de relatório com resultado expirado e as pendentes ou em '
+        'execução há mais que o período de retenção (ex.: worker reiniciado)'
+    )
+
+    def handle(self, *args, **options):
+        agora = timezone.now()
+        removidas, _ = TarefaRelatorio.objects.filter(
+            Q(expira_em__lte=agora) | Q(expira_em__isnull=True, criada_em__lte=agora - retencao())
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(f'{removidas} tarefas de relatório removidas'))
@@ -0,0 +1,37 @@
+"""
+Reconstrução das tabelas consolidadas de vendas por dia e por produto e dia
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from relatorios.consolidacao import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula vendas_diarias e vendas_produtos_diarias a partir dos pedidos '
+        '(todo o histórico ou um período)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-inicio', type=date.fromisoformat, help='YYYY-MM-DD')
+        parser.add_argument('--data-fim', type=date.fromisoformat, help='YYYY-MM-DD')
+        parser.add_argument(
+            '--dias', type=int, default=31,
+            help='Dias recalculados por transação',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            data_inicio, data_fim, linhas = reconstruir(
+                options['data_inicio'], options['data_fim'], dias=options['dias']
+            )
+        except ValueError:
+            raise CommandError('--data-inicio deve ser anterior a --data-fim')
+        if data_inicio is None:
+            self.stdout.write('Nenhum pedido para consolidar')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Vendas consolidadas de {data_inicio} a {data_fim}: {linhas} linhas'
+        ))
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendaDiaria',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('dia', models.DateField()),
+                ('status', models.CharField(choices=[('Pendente', 'Pendente'), ('Em andamento', 'Em andamento'), ('Finalizado', 'Finalizado'), ('Cancelado', 'Cancelado')], max_length=20)),
+                ('quantidade_pedidos', models.PositiveIntegerField(default=0)),
+                ('valor_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('quantidade_itens', models.PositiveIntegerField(default=0)),
+                ('clientes_distintos', models.PositiveIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Venda Diária',
+                'verbose_name_plural': 'Vendas Diárias',
+                'db_table': 'vendas_diarias',
+                'ordering': ['dia', 'status'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='vendadiaria',
+            constraint=models.UniqueConstraint(fields=('dia', 'status'), name='vendas_diarias_dia_status_uniq'),
+        ),
+    ]
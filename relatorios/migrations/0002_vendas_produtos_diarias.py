@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0003_historico_precos'),
+        ('relatorios', '0001_vendas_diarias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendaProdutoDiaria',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('dia', models.DateField()),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('valor_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('quantidade_pedidos', models.PositiveIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vendas_diarias', to='produtos.produto')),
+            ],
+            options={
+                'verbose_name': 'Venda Diária de Produto',
+                'verbose_name_plural': 'Vendas Diárias de Produtos',
+                'db_table': 'vendas_produtos_diarias',
+                'ordering': ['dia', 'produto'],
+                'indexes': [models.Index(fields=['dia', '-quantidade'], name='vendas_prod_dia_qtd_idx'), models.Index(fields=['dia', '-valor_total'], name='vendas_prod_dia_valor_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='vendaprodutodiaria',
+            constraint=models.UniqueConstraint(fields=('dia', 'produto'), name='vendas_produtos_dia_produto_uniq'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('relatorios', '0002_vendas_produtos_diarias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarefaRelatorio',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('relatorio', models.CharField(max_length=50)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('Pendente', 'Pendente'), ('Executando', 'Executando'), ('Concluída', 'Concluída'), ('Falhou', 'Falhou')], default='Pendente', max_length=20)),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('erro', models.TextField(blank=True)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('iniciada_em', models.DateTimeField(blank=True, null=True)),
+                ('concluida_em', models.DateTimeField(blank=True, null=True)),
+                ('expira_em', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tarefas_relatorios', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tarefa de Relatório',
+                'verbose_name_plural': 'Tarefas de Relatórios',
+                'db_table': 'relatorios_tarefas',
+                'ordering': ['-criada_em'],
+                'indexes': [models.Index(fields=['usuario', '-criada_em'], name='rel_tarefas_usuario_idx'), models.Index(fields=['expira_em'], name='rel_tarefas_expira_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relatorios', '0003_tarefas_relatorios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaConsolidado',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('dia', models.DateField(unique=True)),
+            ],
+            options={
+                'verbose_name': 'Dia Consolidado',
+                'verbose_name_plural': 'Dias Consolidados',
+                'db_table': 'vendas_dias_consolidados',
+                'ordering': ['dia'],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:40
+
+from django.db import migrations
+
+
+def preencher_vendas(apps, schema_editor):
+    """Consolida os pedidos já existentes, em faixas de 31 dias"""
+    # Usa o recálculo da aplicação: as consultas e o fuso são os mesmos dos ajustes
+    from relatorios.consolidacao import reconstruir
+    reconstruir(using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0004_pedido_total_default'),
+        ('relatorios', '0004_dias_consolidados'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_vendas, migrations.RunPython.noop),
+    ]
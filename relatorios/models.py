@@ -1,3 +1,143 @@
+from django.conf import settings
 from django.db import models
+from pedidos.models import Pedido
+from produtos.models import Produto
 
-# Create your models here.
+
+class VendaDiaria(models.Model):
+    """
+    Consolidado de pedidos por dia (no fuso TIME_ZONE) e status.
+
+    Mantido por relatorios.consolidacao a cada gravação de pedidos; os
+    relatórios de período leem só esta tabela.
+    """
+    id = models.AutoField(primary_key=True)
+    dia = models.DateField()
+    status = models.CharField(max_length=20, choices=Pedido.StatusChoices.choices)
+    quantidade_pedidos = models.PositiveIntegerField(default=0)
+    valor_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    quantidade_itens = models.PositiveIntegerField(default=0)
+    clientes_distintos = models.PositiveIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'vendas_diarias'
+        verbose_name = 'Venda Diária'
+        verbose_name_plural = 'Vendas Diárias'
+        ordering = ['dia', 'status']
+        constraints = [
+            models.UniqueConstraint(fields=['dia', 'status'], name='vendas_diarias_dia_status_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.dia} {self.status}: {self.quantidade_pedidos} pedidos'
+
+
+class VendaProdutoDiaria(models.Model):
+    """
+    Quantidade e valor vendidos de cada produto por dia, só de pedidos finalizados.
+
+    Mantido junto com VendaDiaria (relatorios.consolidacao); os índices por
+    dia e métrica atendem o ranking de produtos mais vendidos.
+    """
+    id = models.AutoField(primary_key=True)
+    dia = models.DateField()
+    produto = models.ForeignKey(
+        Produto, on_delete=models.CASCADE, related_name='vendas_diarias'
+    )
+    quantidade = models.PositiveIntegerField(default=0)
+    valor_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    quantidade_pedidos = models.PositiveIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'vendas_produtos_diarias'
+        verbose_name = 'Venda Diária de Produto'
+        verbose_name_plural = 'Vendas Diárias de Produtos'
+        ordering = ['dia', 'produto']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dia', 'produto'], name='vendas_produtos_dia_produto_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['dia', '-quantidade'], name='vendas_prod_dia_qtd_idx'),
+            models.Index(fields=['dia', '-valor_total'], name='vendas_prod_dia_valor_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.dia} {self.produto_id}: {self.quantidade}'
+
+
+class DiaConsolidado(models.Model):
+    """
+    Um dia com vendas consolidadas.
+
+    A linha do dia é travada (select_for_update) por toda gravação nas
+    tabelas consolidadas daquele dia, serializando os ajustes e os recálculos.
+    """
+    id = models.AutoField(primary_key=True)
+    dia = models.DateField(unique=True)
+
+    class Meta:
+        db_table = 'vendas_dias_consolidados'
+        verbose_name = 'Dia Consolidado'
+        verbose_name_plural = 'Dias Consolidados'
+        ordering = ['dia']
+
+    def __str__(self):
+        return str(self.dia)
+
+
+class TarefaRelatorio(models.Model):
+    """
+    Relatório pedido para execução assíncrona e seu resultado.
+
+    Executada por relatorios.tarefas (Celery ou pool de threads); o resultado
+    fica disponível até `expira_em` e depois é removido pelo comando
+    limpar_tarefas_relatorios.
+    """
+    class StatusChoices(models.TextChoices):
+        PENDENTE = 'Pendente', 'Pendente'
+        EXECUTANDO = 'Executando', 'Executando'
+        CONCLUIDA = 'Concluída', 'Concluída'
+        FALHOU = 'Falhou', 'Falhou'
+
+    id = models.AutoField(primary_key=True)
+    relatorio = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=StatusChoices.choices,
+        default=StatusChoices.PENDENTE
+    )
+    resultado = models.JSONField(null=True, blank=True)
+    erro = models.TextField(blank=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='tarefas_relatorios'
+    )
+    criada_em = models.DateTimeField(auto_now_add=True)
+    iniciada_em = models.DateTimeField(null=True, blank=True)
+    concluida_em = models.DateTimeField(null=True, blank=True)
+    expira_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'relatorios_tarefas'
+        verbose_name = 'Tarefa de Relatório'
+        verbose_name_plural = 'Tarefas de Relatórios'
+        ordering = ['-criada_em']
+        indexes = [
+            models.Index(fields=['usuario', '-criada_em'], name='rel_tarefas_usuario_idx'),
+            models.Index(fields=['expira_em'], name='rel_tarefas_expira_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.relatorio} #{self.id} ({self.status})'
+
+    @property
+    def finalizada(self):
+        return self.status in (self.StatusChoices.CONCLUIDA, self.StatusChoices.FALHOU)
@@ -0,0 +1,122 @@
+"""
+Métricas de dashboard calculadas em poucas passadas, com contagem de consultas
+
+Cada métrica é um Count/Sum com filter=Q(...) registrado para um modelo e
+calcular() resolve todas as métricas de um modelo em um único aggregate().
+As vendas saem da tabela consolidada VendaDiaria, que reflete o status atual
+dos pedidos (então também responde quantos estão pendentes).
+"""
+import logging
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from clientes.models import Cliente
+from pedidos.models import Pedido
+from .models import VendaDiaria
+
+
+logger = logging.getLogger(__name__)
+
+STATUS_EM_ABERTO = (Pedido.StatusChoices.PENDENTE, Pedido.StatusChoices.EM_ANDAMENTO)
+
+
+class PainelMetricas:
+    """
+    Acumula métricas por modelo e calcula cada modelo em uma consulta.
+
+    `consultas` conta tudo o que passou pelo banco dentro de medir(), inclusive
+    consultas feitas fora do painel (séries, catálogo), para comparar com o
+    orçamento do dashboard.
+    """
+
+    def __init__(self, nome, orcamento=None, using='default'):
+        self.nome = nome
+        self.orcamento = orcamento
+        self.using = using
+        self.consultas = 0
+        self._metricas = {}
+
+    def adicionar(self, model, **metricas):
+        self._metricas.setdefault(model, {}).update(metricas)
+        return self
+
+    def calcular(self):
+        """Um aggregate() por modelo; somas sem linhas viram zero"""
+        resultado = {}
+        with self.medir():
+            for model, metricas in self._metricas.items():
+                valores = model.objects.using(self.using).aggregate(**metricas)
+                resultado.update(
+                    (nome, 0 if valor is None else valor) for nome, valor in valores.items()
+                )
+        return resultado
+
+    def _contar(self, execute, sql, params, many, context):
+        self.consultas += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def medir(self):
+        """Conta as consultas do bloco; blocos aninhados não contam duas vezes"""
+        conexao = connections[self.using]
+        if self._contar in conexao.execute_wrappers:
+            yield self
+            return
+        with conexao.execute_wrapper(self._contar):
+            yield self
+        if self.orcamento is not None and self.consultas > self.orcamento:
+            logger.warning(
+                'Dashboard %s fez %d consultas (orçamento: %d)',
+                self.nome, self.consultas, self.orcamento,
+            )
+
+
+def adicionar_vendas_mensais(painel, hoje=None):
+    """Vendas finalizadas do mês atual e do anterior, e pedidos em aberto"""
+    hoje = hoje or timezone.localdate()
+    mes_atual = hoje.replace(day=1)
+    mes_anterior = (mes_atual - timedelta(days=1)).replace(day=1)
+    finalizado = Q(status=Pedido.StatusChoices.FINALIZADO)
+    atual = finalizado & Q(dia__gte=mes_atual, dia__lte=hoje)
+    anterior = finalizado & Q(dia__gte=mes_anterior, dia__lt=mes_atual)
+    return painel.adicionar(
+        VendaDiaria,
+        mes_atual_valor=Sum('valor_total', filter=atual),
+        mes_atual_pedidos=Sum('quantidade_pedidos', filter=atual),
+        mes_anterior_valor=Sum('valor_total', filter=anterior),
+        mes_anterior_pedidos=Sum('quantidade_pedidos', filter=anterior),
+        pedidos_pendentes=Sum('quantidade_pedidos', filter=Q(status__in=STATUS_EM_ABERTO)),
+    )
+
+
+def adicionar_totais_vendas(painel):
+    """Pedidos, faturamento e itens vendidos de todo o histórico (todos os status)"""
+    return painel.adicionar(
+        VendaDiaria,
+        total_pedidos=Sum('quantidade_pedidos'),
+        faturamento_total=Sum('valor_total'),
+        produtos_vendidos=Sum('quantidade_itens'),
+    )
+
+
+def adicionar_clientes(painel):
+    """Total de clientes e os ativos: com pedido nos últimos DASHBOARD_DIAS_CLIENTE_ATIVO dias"""
+    dias = getattr(settings, 'DASHBOARD_DIAS_CLIENTE_ATIVO', 90)
+    desde = timezone.now() - timedelta(days=dias)
+    return painel.adicionar(
+        Cliente,
+        total_clientes=Count('id'),
+        clientes_ativos=Count('id', filter=Q(ultimo_pedido_em__gte=desde)),
+    )
+
+
+def novo_painel(nome, orcamento=None):
+    """Painel com o orçamento informado ou o de DASHBOARD_ORCAMENTO_CONSULTAS"""
+    if orcamento is None:
+        orcamento = getattr(settings, 'DASHBOARD_ORCAMENTO_CONSULTAS', 3)
+    return PainelMetricas(nome, orcamento)
@@ -0,0 +1,30 @@
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+from .geradores import RELATORIOS
+from .models import TarefaRelatorio
+
+
+class TarefaRelatorioSerializer(serializers.ModelSerializer):
+    """Pedido de relatório assíncrono; `parametros` são os mesmos da query string do relatório"""
+    relatorio = serializers.ChoiceField(choices=list(RELATORIOS))
+    parametros = serializers.DictField(
+        child=serializers.CharField(allow_blank=True), required=False
+    )
+    resultado_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TarefaRelatorio
+        fields = [
+            'id', 'relatorio', 'parametros', 'status', 'erro', 'criada_em',
+            'iniciada_em', 'concluida_em', 'expira_em', 'resultado_url'
+        ]
+        read_only_fields = [
+            'id', 'status', 'erro', 'criada_em', 'iniciada_em', 'concluida_em', 'expira_em'
+        ]
+
+    def get_resultado_url(self, obj):
+        if obj.status != TarefaRelatorio.StatusChoices.CONCLUIDA:
+            return None
+        return reverse(
+            'tarefas-relatorios-resultado', args=[obj.pk], request=self.context.get('request')
+        )
@@ -0,0 +1,285 @@
+"""
+Consultas agregadas usadas pelos relatórios e pelo dashboard
+"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from clientes.models import Cliente
+from pedidos.models import Pedido
+from .models import VendaDiaria, VendaProdutoDiaria
+
+
+CHAVE_RESUMO_STATUS = 'relatorios:resumo_status'
+
+
+def resumo_por_status(queryset=None, usar_cache=True):
+    """
+    Quantidade de pedidos por status em um único GROUP BY.
+
+    Status sem pedidos aparecem com zero. Sem `queryset` (todos os pedidos),
+    o resultado fica em cache até a próxima alteração de status.
+    """
+    cacheavel = queryset is None and usar_cache
+    if cacheavel:
+        resumo = cache.get(CHAVE_RESUMO_STATUS)
+        if resumo is not None:
+            return resumo
+
+    if queryset is None:
+        queryset = Pedido.objects.all()
+    contagens = dict(
+        queryset.prefetch_related(None)
+        .order_by()
+        .values_list('status')
+        .annotate(quantidade=Count('id'))
+    )
+    resumo = {
+        valor: {'label': label, 'count': contagens.get(valor, 0)}
+        for valor, label in Pedido.StatusChoices.choices
+    }
+
+    if cacheavel:
+        timeout = getattr(settings, 'RESUMO_STATUS_CACHE_TIMEOUT', 300)
+        cache.set(CHAVE_RESUMO_STATUS, resumo, timeout)
+    return resumo
+
+
+def invalidar_resumo_status():
+    cache.delete(CHAVE_RESUMO_STATUS)
+
+
+GRANULARIDADES = {
+    'dia': TruncDay,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+}
+MAX_PERIODOS = 1000
+
+
+def ler_periodo(params, dias_padrao=30):
+    """
+    Lê data_inicio e data_fim (YYYY-MM-DD) da query string.
+
+    Sem datas, usa os últimos `dias_padrao` dias até hoje (no fuso TIME_ZONE).
+    Lança ValueError com a mensagem para o cliente quando o período é inválido.
+    """
+    hoje = timezone.localdate()
+    try:
+        data_fim = date.fromisoformat(params['data_fim']) if params.get('data_fim') else hoje
+        data_inicio = (
+            date.fromisoformat(params['data_inicio']) if params.get('data_inicio')
+            else data_fim - timedelta(days=dias_padrao)
+        )
+    except ValueError:
+        raise ValueError('Formato de data inválido. Use YYYY-MM-DD')
+    if data_inicio > data_fim:
+        raise ValueError('data_inicio deve ser anterior a data_fim')
+    return data_inicio, data_fim
+
+
+def inicio_periodo(dia, granularidade):
+    """Primeiro dia do período (dia, semana iniciada na segunda ou mês) que contém `dia`"""
+    if granularidade == 'semana':
+        return dia - timedelta(days=dia.weekday())
+    if granularidade == 'mes':
+        return dia.replace(day=1)
+    return dia
+
+
+def proximo_periodo(dia, granularidade):
+    if granularidade == 'semana':
+        return dia + timedelta(days=7)
+    if granularidade == 'mes':
+        return (dia.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return dia + timedelta(days=1)
+
+
+def periodos(data_inicio, data_fim, granularidade):
+    """Início de cada período entre as duas datas, inclusive"""
+    dia = inicio_periodo(data_inicio, granularidade)
+    while dia <= data_fim:
+        yield dia
+        dia = proximo_periodo(dia, granularidade)
+
+
+def serie_vendas(data_inicio, data_fim, granularidade='dia', queryset=None):
+    """
+    Valor vendido e quantidade de pedidos por dia, semana ou mês.
+
+    Sem `queryset` a série sai da tabela consolidada (uma linha por dia e
+    status). Com um queryset filtrado, o agrupamento é feito pelo banco sobre
+    os pedidos, truncando data_pedido no fuso TIME_ZONE, em uma única
+    consulta. Períodos sem vendas são preenchidos com zero e pedidos
+    cancelados não entram.
+    """
+    if granularidade not in GRANULARIDADES:
+        raise ValueError(f"Granularidade inválida. Use: {', '.join(GRANULARIDADES)}")
+    inicios = list(periodos(data_inicio, data_fim, granularidade))
+    if len(inicios) > MAX_PERIODOS:
+        raise ValueError(
+            f'O período gera mais de {MAX_PERIODOS} intervalos; use uma granularidade maior'
+        )
+
+    if queryset is None:
+        por_periodo = {}
+        for linha in consolidado_diario(data_inicio, data_fim):
+            periodo = por_periodo.setdefault(
+                inicio_periodo(linha['dia'], granularidade),
+                {'valor_total': Decimal('0.00'), 'quantidade_pedidos': 0},
+            )
+            periodo['valor_total'] += linha['valor_total']
+            periodo['quantidade_pedidos'] += linha['quantidade_pedidos']
+    else:
+        por_periodo = _serie_pedidos(queryset, data_inicio, data_fim, granularidade)
+
+    serie = []
+    for inicio in inicios:
+        linha = por_periodo.get(inicio, {})
+        serie.append({
+            'periodo': inicio,
+            'valor_total': linha.get('valor_total') or Decimal('0.00'),
+            'quantidade_pedidos': linha.get('quantidade_pedidos', 0),
+        })
+    return serie
+
+
+def _serie_pedidos(queryset, data_inicio, data_fim, granularidade):
+    fuso = timezone.get_default_timezone()
+    linhas = (
+        queryset.prefetch_related(None)
+        .filter(
+            data_pedido__gte=datetime.combine(data_inicio, time.min, tzinfo=fuso),
+            data_pedido__lt=datetime.combine(data_fim + timedelta(days=1), time.min, tzinfo=fuso),
+        )
+        .exclude(status=Pedido.StatusChoices.CANCELADO)
+        .annotate(periodo=GRANULARIDADES[granularidade]('data_pedido', tzinfo=fuso))
+        .order_by()
+        .values('periodo')
+        .annotate(valor_total=Sum('total'), quantidade_pedidos=Count('id'))
+    )
+    return {
+        timezone.localtime(linha['periodo'], fuso).date(): linha for linha in linhas
+    }
+
+
+def consolidado_diario(data_inicio, data_fim, status=None):
+    """
+    Totais por dia entre as duas datas, lidos só de VendaDiaria.
+
+    `status` pode ser um valor ou uma lista; sem ele, entram todos os status
+    menos Cancelado. Dias sem pedidos não aparecem. `clientes_distintos` é
+    exato para um único status; com vários, é a soma dos distintos de cada um.
+    """
+    linhas = VendaDiaria.objects.filter(dia__gte=data_inicio, dia__lte=data_fim)
+    if status is None:
+        linhas = linhas.exclude(status=Pedido.StatusChoices.CANCELADO)
+    elif isinstance(status, str):
+        linhas = linhas.filter(status=status)
+    else:
+        linhas = linhas.filter(status__in=status)
+    return list(
+        linhas.order_by('dia')
+        .values('dia')
+        .annotate(
+            quantidade_pedidos=Sum('quantidade_pedidos'),
+            valor_total=Sum('valor_total'),
+            quantidade_itens=Sum('quantidade_itens'),
+            clientes_distintos=Sum('clientes_distintos'),
+        )
+    )
+
+
+def somar_dias(dias):
+    """Soma as linhas de consolidado_diario() em totais do período, com o valor médio por pedido"""
+    quantidade = sum(dia['quantidade_pedidos'] for dia in dias)
+    valor = sum((dia['valor_total'] for dia in dias), Decimal('0.00'))
+    return {
+        'quantidade_pedidos': quantidade,
+        'valor_total': valor,
+        'valor_medio': (valor / quantidade).quantize(Decimal('0.01')) if quantidade else Decimal('0.00'),
+        'quantidade_itens': sum(dia['quantidade_itens'] for dia in dias),
+    }
+
+
+CRITERIOS_RANKING = {
+    'pedidos': ('qtd_pedidos', 'valor_pedidos'),
+    'valor': ('valor_pedidos', 'qtd_pedidos'),
+}
+
+
+def ler_limite(params, padrao=10, maximo=100):
+    """Lê ?limite= da query string, entre 1 e `maximo`"""
+    try:
+        limite = int(params.get('limite', padrao))
+    except (TypeError, ValueError):
+        raise ValueError('limite deve ser um número inteiro')
+    return max(1, min(limite, maximo))
+
+
+def ranking_clientes(limite=10, criterio='pedidos', status=None, queryset=None):
+    """
+    Clientes com mais pedidos ou maior valor gasto, em uma única consulta.
+
+    Cada cliente vem anotado com `qtd_pedidos` e `valor_pedidos`. Sem `status`
+    a ordenação usa os contadores persistidos (indexados); com `status` os
+    valores são agregados apenas sobre os pedidos daquele status.
+    """
+    if criterio not in CRITERIOS_RANKING:
+        raise ValueError(f"Critério inválido. Use: {', '.join(CRITERIOS_RANKING)}")
+    if queryset is None:
+        queryset = Cliente.objects.all()
+
+    if status is None:
+        queryset = queryset.annotate(
+            qtd_pedidos=F('total_pedidos'),
+            valor_pedidos=F('valor_total_gasto'),
+        )
+        colunas = {'qtd_pedidos': 'total_pedidos', 'valor_pedidos': 'valor_total_gasto'}
+        ordem = [f'-{colunas[campo]}' for campo in CRITERIOS_RANKING[criterio]]
+    else:
+        queryset = queryset.filter(pedidos__status=status).annotate(
+            qtd_pedidos=Count('pedidos'),
+            valor_pedidos=Sum('pedidos__total'),
+        )
+        ordem = [f'-{campo}' for campo in CRITERIOS_RANKING[criterio]]
+    return queryset.order_by(*ordem, 'pk')[:limite]
+
+
+CRITERIOS_PRODUTOS = {
+    'quantidade': ('quantidade_vendida', 'valor_total'),
+    'valor': ('valor_total', 'quantidade_vendida'),
+}
+
+
+def ranking_produtos(limite=10, criterio='quantidade', data_inicio=None, data_fim=None):
+    """
+    Produtos mais vendidos (pedidos finalizados) por quantidade ou valor.
+
+    Lê só VendaProdutoDiaria: um GROUP BY por produto sobre os dias do
+    período (ou todo o histórico sem datas). Cada linha traz produto_id,
+    quantidade_vendida, valor_total e quantidade_pedidos.
+    """
+    if criterio not in CRITERIOS_PRODUTOS:
+        raise ValueError(f"Critério inválido. Use: {', '.join(CRITERIOS_PRODUTOS)}")
+    linhas = VendaProdutoDiaria.objects.all()
+    if data_inicio:
+        linhas = linhas.filter(dia__gte=data_inicio)
+    if data_fim:
+        linhas = linhas.filter(dia__lte=data_fim)
+    ordem = [f'-{campo}' for campo in CRITERIOS_PRODUTOS[criterio]]
+    return list(
+        linhas.order_by()
+        .values('produto_id')
+        .annotate(
+            quantidade_vendida=Sum('quantidade'),
+            valor_total=Sum('valor_total'),
+            quantidade_pedidos=Sum('quantidade_pedidos'),
+        )
+        .order_by(*ordem, 'produto_id')[:limite]
+    )
@@ -0,0 +1,190 @@
+"""
+Ajuste das tabelas consolidadas e invalidação dos caches quando pedidos,
+itens e clientes mudam
+
+Os ajustes de vendas rodam na transação da gravação; a troca de versão das
+etiquetas do cache de relatórios fica para depois do commit. O estado anterior
+de pedidos e itens é o lido junto com a instância (post_init), atualizado a
+cada save; só instâncias lidas sem esses campos consultam o banco no pre_save.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from clientes.models import Cliente
+from clientes.signals import clientes_alterados_em_lote
+from pedidos.models import Pedido, PedidoItem
+from pedidos.signals import itens_alterados, pedido_relido, pedidos_alterados_em_lote
+from .cache import invalidar_etiquetas
+from .consolidacao import (
+    CAMPOS_ESTADO, EstadoPedido, dia_local, dias_dos_pedidos, estado_pedido,
+    recalcular_dias, registrar_itens, registrar_pedido, registrar_pedidos_criados,
+    registrar_totais
+)
+from .services import invalidar_resumo_status
+
+
+# Campos guardados no post_init para calcular as diferenças sem reler o banco no save
+CAMPOS_PEDIDO = ('data_pedido', 'status', 'cliente_id', 'total')
+CAMPOS_ITEM = ('pedido_id', 'produto_id', 'quantidade', 'valor_total')
+
+ItemVendido = namedtuple('ItemVendido', CAMPOS_ITEM)
+
+
+def _valores(instance, campos):
+    """Valores dos campos na instância, ou None se algum não foi carregado (only/defer)"""
+    dados = instance.__dict__
+    if any(campo not in dados for campo in campos):
+        return None
+    return tuple(dados[campo] for campo in campos)
+
+
+def _valores_gravados(instance, anteriores, campos, update_fields):
+    """Valores no banco depois do save: campos fora de update_fields ficam como estavam"""
+    dados = instance.__dict__
+    gravados = None
+    if update_fields is not None:
+        gravados = {campo.removesuffix('_id') for campo in update_fields}
+    valores = []
+    for posicao, campo in enumerate(campos):
+        if campo in dados and (gravados is None or campo.removesuffix('_id') in gravados):
+            valores.append(dados[campo])
+        elif anteriores is not None:
+            valores.append(anteriores[posicao])
+        else:
+            return None
+    return tuple(valores)
+
+
+def _estado(valores):
+    data_pedido, status, cliente_id, total = valores
+    return EstadoPedido(dia_local(data_pedido), status, cliente_id, Decimal(str(total)))
+
+
+@receiver(post_init, sender=Pedido)
+def guardar_pedido_original(sender, instance, **kwargs):
+    # Estado lido do banco junto com a instância: os ajustes não precisam de outra consulta
+    instance._vendas_original = _valores(instance, CAMPOS_PEDIDO) if instance.pk else None
+
+
+@receiver(pedido_relido)
+def atualizar_pedido_original(sender, instance, fields=None, **kwargs):
+    # Campos relidos (ex.: totais recalculados com UPDATE) já são o estado gravado
+    original = getattr(instance, '_vendas_original', None)
+    if original is not None:
+        instance._vendas_original = _valores_gravados(instance, original, CAMPOS_PEDIDO, fields)
+
+
+@receiver(pre_save, sender=Pedido)
+def guardar_estado_vendas(sender, instance, update_fields=None, using=None, **kwargs):
+    instance._vendas_antes = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and not CAMPOS_ESTADO & set(update_fields):
+        return
+    if getattr(instance, '_vendas_original', None) is None:
+        # Instância lida sem algum dos campos: o estado anterior vem do banco
+        instance._vendas_original = (
+            Pedido.objects.using(using).filter(pk=instance.pk).values_list(*CAMPOS_PEDIDO).first()
+        )
+    if instance._vendas_original is not None:
+        instance._vendas_antes = _estado(instance._vendas_original)
+
+
+@receiver(post_save, sender=Pedido)
+def pedido_salvo(sender, instance, created, update_fields=None, using=None, **kwargs):
+    antes = getattr(instance, '_vendas_antes', None)
+    gravados = _valores_gravados(
+        instance, getattr(instance, '_vendas_original', None), CAMPOS_PEDIDO, update_fields
+    )
+    if gravados is not None and (created or antes is not None):
+        registrar_pedido(instance.pk, antes, _estado(gravados), using=using)
+    instance._vendas_original = gravados
+    invalidar_etiquetas('pedidos', using=using)
+    # Saves restritos a outros campos (ex.: totais) não mudam a contagem por status
+    if not created and update_fields is not None and 'status' not in update_fields:
+        return
+    transaction.on_commit(invalidar_resumo_status, using=using)
+
+
+@receiver(pre_delete, sender=Pedido)
+def guardar_itens_vendas(sender, instance, using=None, **kwargs):
+    # Os itens saem antes do pedido, na cascata
+    instance._vendas_itens = list(
+        PedidoItem.objects.using(using).filter(pedido_id=instance.pk)
+        .only('pedido_id', 'produto_id', 'quantidade', 'valor_total')
+    )
+
+
+@receiver(post_delete, sender=Pedido)
+def pedido_excluido(sender, instance, using=None, **kwargs):
+    original = getattr(instance, '_vendas_original', None)
+    registrar_pedido(
+        instance.pk, _estado(original) if original else estado_pedido(instance), None,
+        itens=getattr(instance, '_vendas_itens', None), using=using,
+    )
+    invalidar_etiquetas('pedidos', using=using)
+    transaction.on_commit(invalidar_resumo_status, using=using)
+
+
+@receiver(post_init, sender=PedidoItem)
+def guardar_item_original(sender, instance, **kwargs):
+    instance._vendas_original = _valores(instance, CAMPOS_ITEM) if instance.pk else None
+
+
+@receiver(pre_save, sender=PedidoItem)
+def guardar_item_vendas(sender, instance, using=None, **kwargs):
+    instance._vendas_antes = None
+    if instance._state.adding:
+        return
+    if getattr(instance, '_vendas_original', None) is None:
+        instance._vendas_original = (
+            PedidoItem.objects.using(using).filter(pk=instance.pk).values_list(*CAMPOS_ITEM).first()
+        )
+    if instance._vendas_original is not None:
+        instance._vendas_antes = ItemVendido(*instance._vendas_original)
+
+
+@receiver(post_save, sender=PedidoItem)
+def item_salvo(sender, instance, update_fields=None, using=None, **kwargs):
+    antes = getattr(instance, '_vendas_antes', None)
+    gravados = _valores_gravados(
+        instance, getattr(instance, '_vendas_original', None), CAMPOS_ITEM, update_fields
+    )
+    if gravados is not None:
+        registrar_itens([antes] if antes else [], [ItemVendido(*gravados)], using=using)
+    instance._vendas_original = gravados
+
+
+@receiver(itens_alterados)
+def itens_gravados(sender, antes=(), depois=(), using=None, **kwargs):
+    registrar_itens(antes, depois, using=using or 'default')
+
+
+@receiver(pedidos_alterados_em_lote)
+def pedidos_alterados(sender, pedido_ids=None, using=None, criados=False,
+                      totais_anteriores=None, **kwargs):
+    using = using or 'default'
+    if criados:
+        registrar_pedidos_criados(pedido_ids or [], using=using)
+    elif totais_anteriores is not None:
+        registrar_totais(totais_anteriores, using=using)
+    else:
+        # Sem o estado anterior, só recalculando os dias inteiros
+        recalcular_dias(dias_dos_pedidos(pedido_ids or [], using=using), using=using)
+    invalidar_etiquetas('pedidos', using=using)
+    transaction.on_commit(invalidar_resumo_status, using=using)
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_delete, sender=Cliente)
+def cliente_alterado(sender, using=None, **kwargs):
+    invalidar_etiquetas('clientes', using=using)
+
+
+@receiver(clientes_alterados_em_lote)
+def clientes_alterados(sender, using=None, **kwargs):
+    invalidar_etiquetas('clientes', using=using)
@@ -0,0 +1,132 @@
+"""
+Execução assíncrona dos relatórios de relatorios.geradores
+
+RELATORIOS_TAREFAS_BACKEND escolhe onde as tarefas rodam:
+
+- celery: fila do Celery de vendaspro.celery (padrão quando REDIS_URL está
+  definido); se o broker não aceitar a tarefa, ela roda no pool de threads;
+- thread: pool de threads do próprio processo (padrão sem REDIS_URL);
+- eager: na hora, ao fim da transação que criou a tarefa (testes e scripts).
+
+O estado e o resultado das tarefas ficam na tabela TarefaRelatorio, vista por
+todos os processos: qualquer worker responde à consulta de uma tarefa.
+
+A tarefa só é enfileirada depois do commit e o worker a assume com um UPDATE
+condicional, então uma entrega repetida não executa o relatório duas vezes.
+O resultado é gravado como o mesmo JSON da resposta síncrona.
+"""
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .geradores import RELATORIOS
+from .models import TarefaRelatorio
+
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('thread', 'eager', 'celery')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def backend_configurado():
+    return getattr(settings, 'RELATORIOS_TAREFAS_BACKEND', 'thread')
+
+
+def retencao():
+    return timedelta(hours=getattr(settings, 'RELATORIOS_TAREFAS_RETENCAO_HORAS', 24))
+
+
+def _pool_threads():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max(1, getattr(settings, 'RELATORIOS_TAREFAS_THREADS', 2)),
+                thread_name_prefix='relatorios',
+            )
+        return _pool
+
+
+def executar_tarefa(tarefa_id):
+    """Gera o relatório da tarefa, se ainda estiver pendente, e grava o resultado ou o erro"""
+    assumida = TarefaRelatorio.objects.filter(
+        pk=tarefa_id, status=TarefaRelatorio.StatusChoices.PENDENTE
+    ).update(status=TarefaRelatorio.StatusChoices.EXECUTANDO, iniciada_em=timezone.now())
+    if not assumida:
+        # Já executada por outro worker, ou removida
+        return
+    tarefa = TarefaRelatorio.objects.get(pk=tarefa_id)
+    try:
+        dados = RELATORIOS[tarefa.relatorio](tarefa.parametros)
+        tarefa.resultado = json.loads(JSONRenderer().render(dados))
+        tarefa.status = TarefaRelatorio.StatusChoices.CONCLUIDA
+    except ValueError as exc:
+        tarefa.erro = str(exc)
+        tarefa.status = TarefaRelatorio.StatusChoices.FALHOU
+    except Exception:
+        logger.exception('Falha na tarefa de relatório %s (%s)', tarefa_id, tarefa.relatorio)
+        tarefa.erro = 'Erro interno ao gerar o relatório'
+        tarefa.status = TarefaRelatorio.StatusChoices.FALHOU
+    tarefa.concluida_em = timezone.now()
+    tarefa.expira_em = tarefa.concluida_em + retencao()
+    tarefa.save(update_fields=['status', 'resultado', 'erro', 'concluida_em', 'expira_em'])
+
+
+def _executar_em_thread(tarefa_id):
+    # Cada thread do pool tem sua conexão; fecha como ao fim de uma requisição
+    close_old_connections()
+    try:
+        executar_tarefa(tarefa_id)
+    finally:
+        close_old_connections()
+
+
+def enfileirar(tarefa_id):
+    backend = backend_configurado()
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(
+            f"RELATORIOS_TAREFAS_BACKEND inválido: {backend!r} (use {', '.join(BACKENDS)})"
+        )
+    if backend == 'eager':
+        executar_tarefa(tarefa_id)
+        return
+    if backend == 'celery':
+        try:
+            from .tasks import executar_tarefa_relatorio
+            # Uma tentativa só: com o broker fora do ar, cai no pool em vez de
+            # segurar a requisição enquanto o kombu tenta reconectar
+            executar_tarefa_relatorio.apply_async(args=[tarefa_id], retry=False)
+            return
+        except Exception:
+            logger.warning(
+                'Celery indisponível; tarefa de relatório %s executada no pool de threads',
+                tarefa_id, exc_info=True,
+            )
+    _pool_threads().submit(_executar_em_thread, tarefa_id)
+
+
+def submeter(relatorio, parametros=None, usuario=None):
+    """
+    Cria a tarefa pendente e a enfileira quando a transação atual for confirmada.
+
+    `relatorio` é uma das chaves de relatorios.geradores.RELATORIOS.
+    """
+    if relatorio not in RELATORIOS:
+        raise ValueError(f"Relatório inválido. Use: {', '.join(RELATORIOS)}")
+    tarefa = TarefaRelatorio.objects.create(
+        relatorio=relatorio, parametros=parametros or {}, usuario=usuario
+    )
+    transaction.on_commit(partial(enfileirar, tarefa.pk))
+    return tarefa
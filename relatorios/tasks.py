@@ -0,0 +1,11 @@
+"""
+Tarefas Celery do app (usadas quando RELATORIOS_TAREFAS_BACKEND=celery)
+"""
+from vendaspro.celery import app
+
+from .tarefas import executar_tarefa
+
+
+@app.task(name='relatorios.executar_tarefa', ignore_result=True)
+def executar_tarefa_relatorio(tarefa_id):
+    executar_tarefa(tarefa_id)
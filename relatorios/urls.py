@@ -1,8 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RelatorioViewSet
+from .views import RelatorioViewSet, TarefaRelatorioViewSet
 
 router = DefaultRouter()
+router.register(r'relatorios/tarefas', TarefaRelatorioViewSet, basename='tarefas-relatorios')
 router.register(r'relatorios', RelatorioViewSet, basename='relatorios')
 
 urlpatterns = [
@@ -1,156 +1,134 @@
-from django.shortcuts import render
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum, Count, Q, Avg
+from rest_framework.reverse import reverse
+from django.db.models import Q
 from django.utils import timezone
-from datetime import datetime, timedelta
-from clientes.models import Cliente
-from produtos.models import Produto
-from pedidos.models import Pedido, PedidoItem
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from produtos.catalogo import catalogo
+from .cache import relatorio_em_cache
+from .geradores import (
+    relatorio_clientes_top, relatorio_produtos_mais_vendidos, relatorio_vendas_periodo
+)
+from .models import TarefaRelatorio
+from .painel import adicionar_clientes, adicionar_vendas_mensais, novo_painel
+from .serializers import TarefaRelatorioSerializer
+from .tarefas import submeter
 
 
 class RelatorioViewSet(viewsets.ViewSet):
     """ViewSet para relatórios do sistema"""
     
     @action(detail=False, methods=['get'])
+    @relatorio_em_cache('pedidos')
     def vendas_periodo(self, request):
-        """Relatório de vendas por período"""
-        data_inicio = request.query_params.get('data_inicio')
-        data_fim = request.query_params.get('data_fim')
-        
-        if not data_inicio or not data_fim:
-            return Response(
-                {'error': 'data_inicio e data_fim são obrigatórios'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
+        """Relatório de vendas por período (lido da tabela consolidada por dia)"""
         try:
-            data_inicio = datetime.strptime(data_inicio, '%Y-%m-%d').date()
-            data_fim = datetime.strptime(data_fim, '%Y-%m-%d').date()
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        pedidos = Pedido.objects.filter(
-            data_criacao__date__range=[data_inicio, data_fim],
-            status='Finalizado'
-        )
-        
-        relatorio = {
-            'periodo': {
-                'inicio': data_inicio,
-                'fim': data_fim
-            },
-            'total_vendas': pedidos.count(),
-            'valor_total': pedidos.aggregate(Sum('total'))['total__sum'] or 0,
-            'valor_medio': pedidos.aggregate(Avg('total'))['total__avg'] or 0,
-            'vendas_por_dia': list(
-                pedidos.values('data_criacao__date')
-                .annotate(
-                    total_vendas=Count('id'),
-                    valor_total=Sum('total')
-                )
-                .order_by('data_criacao__date')
-            )
-        }
-        
-        return Response(relatorio)
+            return Response(relatorio_vendas_periodo(request.query_params))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=False, methods=['get'])
+    @relatorio_em_cache('pedidos', 'produtos')
     def produtos_mais_vendidos(self, request):
-        """Relatório dos produtos mais vendidos"""
-        limite = int(request.query_params.get('limite', 10))
-        
-        produtos_vendidos = (
-            PedidoItem.objects
-            .filter(pedido__status='Finalizado')
-            .values('produto__nome', 'produto__codigo')
-            .annotate(
-                quantidade_vendida=Sum('quantidade'),
-                valor_total=Sum('subtotal')
-            )
-            .order_by('-quantidade_vendida')[:limite]
-        )
-        
-        return Response(list(produtos_vendidos))
+        """Relatório dos produtos mais vendidos (todo o histórico, ou o período de data_inicio/data_fim)"""
+        try:
+            return Response(relatorio_produtos_mais_vendidos(request.query_params))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=False, methods=['get'])
+    @relatorio_em_cache('pedidos', 'clientes')
     def clientes_top(self, request):
         """Relatório dos melhores clientes"""
-        limite = int(request.query_params.get('limite', 10))
-        
-        clientes_top = (
-            Cliente.objects
-            .filter(pedidos__status='Finalizado')
-            .annotate(
-                total_compras=Sum('pedidos__total'),
-                numero_pedidos=Count('pedidos')
-            )
-            .order_by('-total_compras')[:limite]
-        )
-        
-        data = []
-        for cliente in clientes_top:
-            data.append({
-                'id': cliente.id,
-                'nome': cliente.nome,
-                'email': cliente.email,
-                'total_compras': cliente.total_compras,
-                'numero_pedidos': cliente.numero_pedidos
-            })
-        
-        return Response(data)
+        try:
+            return Response(relatorio_clientes_top(request.query_params))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=False, methods=['get'])
+    @relatorio_em_cache('pedidos', 'clientes', 'produtos')
     def dashboard(self, request):
-        """Dados para dashboard principal"""
-        hoje = timezone.now().date()
-        mes_atual = hoje.replace(day=1)
-        mes_anterior = (mes_atual - timedelta(days=1)).replace(day=1)
-        
-        # Estatísticas gerais
-        total_clientes = Cliente.objects.filter(ativo=True).count()
-        total_produtos = Produto.objects.filter(ativo=True).count()
-        pedidos_pendentes = Pedido.objects.filter(
-            status__in=['Pendente', 'Processando', 'Em progresso']
-        ).count()
-        
-        # Vendas do mês atual
-        vendas_mes_atual = Pedido.objects.filter(
-            data_criacao__date__gte=mes_atual,
-            status='Finalizado'
-        ).aggregate(
-            total=Sum('total'),
-            quantidade=Count('id')
-        )
-        
-        # Vendas do mês anterior
-        vendas_mes_anterior = Pedido.objects.filter(
-            data_criacao__date__gte=mes_anterior,
-            data_criacao__date__lt=mes_atual,
-            status='Finalizado'
-        ).aggregate(
-            total=Sum('total'),
-            quantidade=Count('id')
-        )
+        """Dados para dashboard principal (duas consultas: vendas consolidadas e clientes)"""
+        painel = novo_painel('relatorios.dashboard')
+        with painel.medir():
+            adicionar_vendas_mensais(painel)
+            adicionar_clientes(painel)
+            metricas = painel.calcular()
+            # Produtos ativos do catálogo em memória
+            total_produtos = len(catalogo.ativos())
         
         dashboard_data = {
             'estatisticas_gerais': {
-                'total_clientes': total_clientes,
+                'total_clientes': metricas['total_clientes'],
+                'clientes_ativos': metricas['clientes_ativos'],
                 'total_produtos': total_produtos,
-                'pedidos_pendentes': pedidos_pendentes
+                'pedidos_pendentes': metricas['pedidos_pendentes']
             },
             'vendas_mes_atual': {
-                'valor_total': vendas_mes_atual['total'] or 0,
-                'quantidade_pedidos': vendas_mes_atual['quantidade'] or 0
+                'valor_total': metricas['mes_atual_valor'],
+                'quantidade_pedidos': metricas['mes_atual_pedidos']
             },
             'vendas_mes_anterior': {
-                'valor_total': vendas_mes_anterior['total'] or 0,
-                'quantidade_pedidos': vendas_mes_anterior['quantidade'] or 0
+                'valor_total': metricas['mes_anterior_valor'],
+                'quantidade_pedidos': metricas['mes_anterior_pedidos']
             }
         }
         
-        return Response(dashboard_data)
+        response = Response(dashboard_data)
+        response['X-Query-Count'] = painel.consultas
+        return response
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class TarefaRelatorioViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
+                             mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Relatórios executados em segundo plano: o POST devolve a tarefa (202) e
+    o cliente consulta o status até o resultado ficar disponível.
+    
+    Cada usuário vê só as próprias tarefas (a equipe vê todas); tarefas
+    expiradas deixam de ser servidas.
+    """
+    serializer_class = TarefaRelatorioSerializer
+    
+    def get_queryset(self):
+        queryset = TarefaRelatorio.objects.defer('resultado').filter(
+            Q(expira_em__isnull=True) | Q(expira_em__gt=timezone.now())
+        )
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(usuario=self.request.user)
+        return queryset
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tarefa = submeter(
+            serializer.validated_data['relatorio'],
+            serializer.validated_data.get('parametros'),
+            usuario=request.user
+        )
+        url = reverse('tarefas-relatorios-detail', args=[tarefa.pk], request=request)
+        return Response(
+            self.get_serializer(tarefa).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': url}
+        )
+    
+    @action(detail=True, methods=['get'])
+    def resultado(self, request, pk=None):
+        """Resultado da tarefa em JSON (202 enquanto executa, 422 se falhou)"""
+        tarefa = self.get_object()
+        if tarefa.status == TarefaRelatorio.StatusChoices.FALHOU:
+            return Response({'error': tarefa.erro}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if tarefa.status != TarefaRelatorio.StatusChoices.CONCLUIDA:
+            response = Response(self.get_serializer(tarefa).data, status=status.HTTP_202_ACCEPTED)
+            response['Retry-After'] = 2
+            return response
+        
+        response = Response(tarefa.resultado)
+        response['Content-Disposition'] = (
+            f'attachment; filename="{tarefa.relatorio}-{tarefa.pk}.json"'
+        )
+        return response
@@ -0,0 +1,17 @@
+"""
+Aplicação Celery do projeto (worker: celery -A vendaspro worker)
+
+Lê as configurações CELERY_* das settings e descobre o tasks.py de cada app.
+Só é importada quando RELATORIOS_TAREFAS_BACKEND=celery, então o Celery não
+precisa estar instalado para rodar o projeto.
+"""
+import os
+
+from celery import Celery
+
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vendaspro.settings.development')
+
+app = Celery('vendaspro')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -131,8 +131,8 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
-        'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
+        'core.filters.BuscaTextualFilter',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_RENDERER_CLASSES': [
@@ -248,6 +248,73 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
 
+# Limite (segundos) de cada conexão ao broker; com o broker fora do ar, publicar uma
+# tarefa desiste logo em vez de segurar a requisição
+CELERY_BROKER_CONNECTION_TIMEOUT = config('CELERY_BROKER_CONNECTION_TIMEOUT', default=1, cast=float)
+CELERY_BROKER_TRANSPORT_OPTIONS = {'socket_connect_timeout': CELERY_BROKER_CONNECTION_TIMEOUT}
+
+# Onde rodam as tarefas de relatório: thread (pool no próprio processo), eager (na hora) ou
+# celery; o padrão é celery quando REDIS_URL está definido e thread sem ele
+RELATORIOS_TAREFAS_BACKEND = config(
+    'RELATORIOS_TAREFAS_BACKEND', default='celery' if config('REDIS_URL', default='') else 'thread'
+)
+
+# Threads do pool quando RELATORIOS_TAREFAS_BACKEND=thread (ou quando o Celery não aceita a tarefa)
+RELATORIOS_TAREFAS_THREADS = config('RELATORIOS_TAREFAS_THREADS', default=2, cast=int)
+
+# Horas que o resultado de uma tarefa de relatório fica disponível para download
+RELATORIOS_TAREFAS_RETENCAO_HORAS = config('RELATORIOS_TAREFAS_RETENCAO_HORAS', default=24, cast=int)
+
+# Quantidade de números de pedido reservados por worker a cada acesso à sequência
+PEDIDO_NUMERO_BLOCO = config('PEDIDO_NUMERO_BLOCO', default=20, cast=int)
+
+# Linhas lidas do banco por vez na exportação de pedidos
+EXPORTACAO_CHUNK_SIZE = config('EXPORTACAO_CHUNK_SIZE', default=2000, cast=int)
+
+# Registros validados e gravados por transação nas importações em lote
+IMPORTACAO_TAMANHO_LOTE = config('IMPORTACAO_TAMANHO_LOTE', default=500, cast=int)
+
+# Cache (memória local por padrão; defina CACHE_REDIS_URL para compartilhar entre processos,
+# obrigatório em produção)
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Validade máxima (segundos) da contagem de pedidos por status em cache
+RESUMO_STATUS_CACHE_TIMEOUT = config('RESUMO_STATUS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Validade máxima (segundos) do resumo de pedidos por cliente em cache
+RESUMO_CLIENTE_CACHE_TIMEOUT = config('RESUMO_CLIENTE_CACHE_TIMEOUT', default=600, cast=int)
+
+# Idade máxima (segundos) do catálogo de produtos em memória de cada processo
+CATALOGO_PRODUTOS_TTL = config('CATALOGO_PRODUTOS_TTL', default=300, cast=int)
+
+# Backend da busca textual (?search=): auto, fts5, postgres ou contains
+BUSCA_TEXTUAL_BACKEND = config('BUSCA_TEXTUAL_BACKEND', default='auto')
+
+# Máximo de produtos por consulta de preços em uma data (produtos/precos_em)
+PRECOS_EM_MAX_PRODUTOS = config('PRECOS_EM_MAX_PRODUTOS', default=10000, cast=int)
+
+# Consultas ao banco aceitas por requisição de dashboard (acima disso, aviso no log)
+DASHBOARD_ORCAMENTO_CONSULTAS = config('DASHBOARD_ORCAMENTO_CONSULTAS', default=3, cast=int)
+
+# Clientes com pedido nos últimos N dias contam como ativos no dashboard
+DASHBOARD_DIAS_CLIENTE_ATIVO = config('DASHBOARD_DIAS_CLIENTE_ATIVO', default=90, cast=int)
+
+# Validade máxima (segundos) dos resultados de relatórios em cache; gravações invalidam antes
+RELATORIOS_CACHE_TIMEOUT = config('RELATORIOS_CACHE_TIMEOUT', default=300, cast=int)
+
 # JWT Configuration
 from rest_framework_simplejwt.settings import api_settings
 
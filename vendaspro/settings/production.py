@@ -4,6 +4,16 @@ DEBUG = False
 
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', cast=lambda v: [s.strip() for s in v.split(',')])
 
+# Cache compartilhado entre os processos (obrigatório): a invalidação dos relatórios
+# e dos resumos de pedidos por status e por cliente só vale para quem lê o mesmo cache
+CACHE_REDIS_URL = config('CACHE_REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+    }
+}
+
 # Security settings para produção
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
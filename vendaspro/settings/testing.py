@@ -20,6 +20,9 @@ class DisableMigrations:
 
 MIGRATION_MODULES = DisableMigrations()
 
+# Tarefas de relatório executadas na hora: o banco em memória não é visto por outras threads
+RELATORIOS_TAREFAS_BACKEND = 'eager'
+
 # Senha simples para testes
 AUTH_PASSWORD_VALIDATORS = []
 
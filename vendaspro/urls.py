@@ -38,6 +38,7 @@ urlpatterns = [
     path('api/v1/', include('produtos.urls')),
     path('api/v1/', include('pedidos.urls')),
     path('api/v1/', include('core.urls')),
+    path('api/v1/', include('relatorios.urls')),
     path('api/v1/desafio-vogal/', include('desafio_vogal.urls')),
     path('api/', api_root, name='api_root'),
     